@@ -1082,6 +1082,9 @@ class DrafterAgent:
                 
                 # 全ファイルのfield_valuesを蓄積（懸念点レポート用）
                 all_field_values = {}
+                # 入力はフィールド値がそろってからまとめて行う: (テンプレートのパス, field_values, user_id)
+                fill_jobs = []
+                fill_job_names = []
                 
                 for file_path_orig, file_name_orig in format_files:
                     try:
@@ -1125,23 +1128,22 @@ class DrafterAgent:
                         # 懸念点レポート用に蓄積
                         all_field_values.update(field_values)
                         
-                        # Fill the document
-                        filled_path, fill_message = self.document_filler.fill_document(
-                            file_path_orig,
-                            field_values,
-                            user_id
-                        )
-                        
-                        if filled_path:
-                            filled_filename = os.path.basename(filled_path)
-                            filled_files.append((filled_path, filled_filename))
-                            logging.info(f"[DRAFTER] Successfully filled: {filled_filename}")
-                        else:
-                            logging.warning(f"[DRAFTER] Fill failed for {file_name_orig}: {fill_message}")
+                        fill_jobs.append((file_path_orig, field_values, user_id))
+                        fill_job_names.append(file_name_orig)
                             
                     except Exception as fill_error:
                         logging.warning(f"[DRAFTER] Error filling {file_name_orig}: {fill_error}")
                 
+                # Fill the documents (in parallel; results come back in format_files order)
+                fill_results = self.document_filler.fill_batch(fill_jobs)
+                for file_name_orig, (filled_path, fill_message) in zip(fill_job_names, fill_results):
+                    if filled_path:
+                        filled_filename = os.path.basename(filled_path)
+                        filled_files.append((filled_path, filled_filename))
+                        logging.info(f"[DRAFTER] Successfully filled: {filled_filename}")
+                    else:
+                        logging.warning(f"[DRAFTER] Fill failed for {file_name_orig}: {fill_message}")
+                
                 if filled_files:
                     message += f"\n📋 {len(filled_files)}件のフォーマットに項目別入力しました"
                 
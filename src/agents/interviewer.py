@@ -61,6 +61,10 @@ class InterviewerAgent:
         if history:
             history_context = "\n【これまでの会話履歴】\n"
             for turn in history:
+                if turn["role"] == "system":
+                    # Digest of older turns rolled out of the live history
+                    history_context += f"{turn['content']}\n"
+                    continue
                 role_label = "ユーザー" if turn["role"] == "user" else "エージェント"
                 history_context += f"{role_label}: {turn['content']}\n"
             history_context += "\n"
@@ -86,23 +90,25 @@ class InterviewerAgent:
             # Only count as a turn if it contains understanding level display
             is_interview_question = "[設立者の魂理解度:" in response_text or "[理解度:" in response_text
             
-            # 3. Save this turn to conversation history
-            pm.add_to_history("user", user_message)
-            pm.add_to_history("agent", response_text)
-            
-            # 4. Only increment turn_count if this is an actual interview question
-            # Greetings, clarifications, and thank-you messages won't count
-            if is_interview_question:
-                # Extract and save insights (Fire and forget, or sequential)
-                self._extract_insights(user_message, response_text, user_id, pm)
+            # Persist history and extracted insights for this turn in a single write
+            with pm.transaction():
+                # 3. Save this turn to conversation history
+                pm.add_to_history("user", user_message)
+                pm.add_to_history("agent", response_text)
+                
+                # 4. Only increment turn_count if this is an actual interview question
+                # Greetings, clarifications, and thank-you messages won't count
+                if is_interview_question:
+                    # Extract and save insights (Fire and forget, or sequential)
+                    self._extract_insights(user_message, response_text, user_id, pm)
 
-                # Check if interview is complete (15 turns)
-                if actual_turn_count >= 15:
-                    response_text += "\n\n[INTERVIEW_COMPLETE]"
-            else:
-                # This is a greeting/clarification - don't count it as a turn
-                # The turn_count will remain the same, so next actual question will use the same number
-                print(f"[DEBUG] Response is not an interview question (no understanding level marker), not counting as turn")
+                    # Check if interview is complete (15 turns)
+                    if actual_turn_count >= 15:
+                        response_text += "\n\n[INTERVIEW_COMPLETE]"
+                else:
+                    # This is a greeting/clarification - don't count it as a turn
+                    # The turn_count will remain the same, so next actual question will use the same number
+                    print(f"[DEBUG] Response is not an interview question (no understanding level marker), not counting as turn")
 
             return response_text
         except Exception as e:
@@ -148,8 +154,9 @@ class InterviewerAgent:
                 # File processing failed - inform user and don't count this as a turn
                 error_response = f"申し訳ありません。ファイルの読み込みに失敗しました。\n\nエラー: {str(e)}\n\n通常の対話形式で情報を教えていただけますか？"
                 # Save error message to history but don't increment turn
-                pm.add_to_history("user", user_message + " [添付ファイルあり]")
-                pm.add_to_history("agent", error_response)
+                with pm.transaction():
+                    pm.add_to_history("user", user_message + " [添付ファイルあり]")
+                    pm.add_to_history("agent", error_response)
                 return error_response
         
         # Analyze URLs if any
@@ -226,11 +233,12 @@ class InterviewerAgent:
             analysis_result = response.text
             
             # Save document analysis to conversation history
-            pm.add_to_history("user", f"[資料提供] {user_message}")
-            pm.add_to_history("agent", f"[資料分析] {analysis_result}")
-            
-            # Extract insights from the analysis
-            self._extract_insights(user_message, analysis_result, user_id, pm)
+            with pm.transaction():
+                pm.add_to_history("user", f"[資料提供] {user_message}")
+                pm.add_to_history("agent", f"[資料分析] {analysis_result}")
+                
+                # Extract insights from the analysis
+                self._extract_insights(user_message, analysis_result, user_id, pm)
             
             # Now continue with interview based on the analyzed information
             # Get updated profile
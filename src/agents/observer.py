@@ -137,27 +137,28 @@ class ObserverAgent:
                     future.cancel()  # Cancel to free resources (Playwright browsers, network)
                 notifier.notify_sync(ProgressStage.ANALYZING, f"検証時間が長すぎたため、{len(not_done)}件の処理をスキップしました。")
             
-            # Process completed tasks
-            for future in done:
-                try:
-                    # Get result with timeout to avoid hanging
-                    verified_opp = future.result(timeout=1)
+            # Process completed tasks (shown-grant updates are saved in one write)
+            with self.profile_manager.transaction():
+                for future in done:
+                    try:
+                        # Get result with timeout to avoid hanging
+                        verified_opp = future.result(timeout=1)
                     
-                    if verified_opp and verified_opp.get('is_valid', False):
-                        valid_opportunities.append(verified_opp)
-                        # Mark as shown so we don't show it again immediately
-                        self.profile_manager.add_shown_grant(verified_opp)
-                    else:
-                        title = future_to_opp[future].get('title', 'Unknown')
-                        reason = verified_opp.get('exclude_reason') if verified_opp else 'Verification failed'
-                        logging.info(f"Skipping invalid/closed grant: {title} (Reason: {reason})")
+                        if verified_opp and verified_opp.get('is_valid', False):
+                            valid_opportunities.append(verified_opp)
+                            # Mark as shown so we don't show it again immediately
+                            self.profile_manager.add_shown_grant(verified_opp)
+                        else:
+                            title = future_to_opp[future].get('title', 'Unknown')
+                            reason = verified_opp.get('exclude_reason') if verified_opp else 'Verification failed'
+                            logging.info(f"Skipping invalid/closed grant: {title} (Reason: {reason})")
                         
-                except TimeoutError:
-                    title = future_to_opp[future].get('title', 'Unknown')
-                    logging.error(f"Result retrieval timed out for: {title}")
-                except Exception as e:
-                    title = future_to_opp.get(future, {}).get('title', 'Unknown')
-                    logging.error(f"Error checking grant {title}: {e}")
+                    except TimeoutError:
+                        title = future_to_opp[future].get('title', 'Unknown')
+                        logging.error(f"Result retrieval timed out for: {title}")
+                    except Exception as e:
+                        title = future_to_opp.get(future, {}).get('title', 'Unknown')
+                        logging.error(f"Error checking grant {title}: {e}")
         
         elapsed = time.time() - start_time
         logging.info(f"[PERFORMANCE] Grant verification took {elapsed:.2f}s for {len(candidates_to_verify)} items")
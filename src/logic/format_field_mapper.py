@@ -15,6 +15,22 @@ from google import genai
 from google.genai import types
 from src.utils.office_utils import convert_to_pdf
 
+try:
+    import openpyxl
+    _HAS_XL = True
+except ImportError:
+    openpyxl = None
+    _HAS_XL = False
+
+try:
+    from docx import Document
+    from docx.oxml.table import CT_Tbl
+    from docx.oxml.text.paragraph import CT_P
+    _HAS_DOCX = True
+except ImportError:
+    Document = None
+    _HAS_DOCX = False
+
 
 @dataclass
 class FieldInfo:
@@ -68,9 +84,11 @@ class FormatFieldMapper:
         """
         fields = []
         
+        if not _HAS_XL:
+            self.logger.warning("[FORMAT_MAPPER] openpyxl not installed")
+            return fields
+        
         try:
-            import openpyxl
-            
             wb = openpyxl.load_workbook(file_path, read_only=True)
             
             for sheet_name in wb.sheetnames:
@@ -267,18 +285,17 @@ class FormatFieldMapper:
                 self.logger.warning("[FORMAT_MAPPER] .doc file detected but VLM client is not active")
                 return []
         
+        if not _HAS_DOCX:
+            self.logger.warning("[FORMAT_MAPPER] python-docx not installed")
+            return fields
+        
         try:
-            from docx import Document
-            
             doc = Document(file_path)
             
             # ドキュメント要素（段落とテーブル）の順序を構築（行コンテキスト判定用）
             block_items = []
             try:
                 # python-docxの内部要素にアクセスして順序を特定
-                from docx.oxml.text.paragraph import CT_P
-                from docx.oxml.table import CT_Tbl
-                
                 p_iter = iter(doc.paragraphs)
                 t_iter = iter(doc.tables)
                 p_idx = 0
@@ -1,22 +1,185 @@
+import gzip
 import json
 import os
+import re
 import logging
+import threading
+import time
+import unicodedata
+import uuid
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, List
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Any, Final, Mapping, Optional, List, Set, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 try:
     from google.cloud import storage
+    from google.cloud.exceptions import NotFound
 except ImportError:
     storage = None
 
+    class NotFound(Exception):
+        """Stand-in so the `except NotFound` clauses stay valid without google-cloud-storage."""
+
 try:
     from src.memory.memory_bank_storage import MemoryBankStorage, MEMORY_BANK_AVAILABLE
 except ImportError:
     MemoryBankStorage = None
     MEMORY_BANK_AVAILABLE = False
 
+def _dumps(data: Dict[str, Any], indent: bool = True) -> bytes:
+    """Serializes a profile to UTF-8 JSON bytes (orjson when available)."""
+    if orjson:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, option=option)
+    if indent:
+        return json.dumps(data, indent=4, ensure_ascii=False).encode("utf-8")
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def _loads(content) -> Any:
+    """Parses JSON from bytes or str (orjson when available)."""
+    if orjson:
+        return orjson.loads(content)
+    return json.loads(content)
+
+def _loads_document(content: bytes) -> Any:
+    """Parses a downloaded soul_profile.json, gunzipping it if GCS served the stored bytes."""
+    if content[:2] == b"\x1f\x8b":
+        content = gzip.decompress(content)
+    return _loads(content)
+
+# Profile keys that only ever grow by appending records (or are cleared wholesale).
+# Backends may persist them separately from the main profile document.
+APPEND_ONLY_KEYS = ("conversation_history", "history_archive", "shown_grants", "monthly_summaries")
+
+# conversation_history keeps at most MAX_LIVE_HISTORY entries in the live window. Beyond that the
+# oldest HISTORY_ROLLUP_SIZE entries move to history_archive and are condensed into a leading
+# system digest entry (capped at HISTORY_DIGEST_MAX_CHARS).
+MAX_LIVE_HISTORY = 40
+HISTORY_ROLLUP_SIZE = 10
+HISTORY_DIGEST_MAX_CHARS = 4000
+HISTORY_DIGEST_HEADER = "[これまでの会話の要約]\n"
+
+# Max concurrent downloads when scanning other NPO profiles
+PROFILE_FETCH_WORKERS = 32
+
+# How long a profiles/ listing is reused before list_all_profiles() lists the bucket again
+PROFILE_LIST_TTL_SECONDS = 60
+# Max other-NPO profiles kept in memory (least recently used are evicted first)
+PROFILE_CACHE_MAX_ENTRIES = 1024
+
+# Other NPO profiles already downloaded by list_all_profiles():
+# blob name -> (generation, profile, resonance features). A blob is re-downloaded only when
+# its generation changes.
+_PROFILE_CACHE: "OrderedDict[str, tuple]" = OrderedDict()
+# bucket name -> (expires_at, [(user_id, blob), ...]) from the last profiles/ listing
+_PROFILE_LIST_CACHE: Dict[str, tuple] = {}
+_PROFILE_CACHE_LOCK = threading.Lock()
+
+def _dump_records(records: List[Any]) -> bytes:
+    """Serializes records as newline-delimited JSON."""
+    return b"".join(_dumps(record, indent=False) + b"\n" for record in records)
+
+# Category labels in Japanese, used by ProfileManager.get_profile_context()
+_CATEGORY_LABELS: Final[Mapping[str, str]] = MappingProxyType({
+    # Core Identity & Origin
+    "primary_experience": "🌱 原体験",
+    "origin_story": "📖 創設ストーリー",
+    "mission": "🎯 ミッション",
+    "vision": "🌟 ビジョン",
+    "values": "💎 価値観",
+
+    # Organization Details - Individual Fields
+    "org_name": "🏢 団体名",
+    "representative_name": "👤 代表者名",
+    "phone_number": "📞 連絡先電話番号",
+    "website_url": "🌐 ホームページ",
+    "email_address": "📧 メールアドレス",
+    "founding_year": "📅 設立年",
+    "annual_budget": "💰 年間予算",
+
+    # Legacy organization info (for backward compatibility)
+    "organization_info": "🏢 団体基本情報",
+    "contact_info": "📞 連絡先情報",
+    "staff_info": "👥 スタッフ構成",
+    "finance_info": "💰 財務状況",
+
+    # Project Concept
+    "project_name": "🚀 プロジェクト名",
+    "project_plan": "📝 プロジェクト計画",
+    "activity_plan": "📅 活動スケジュール",
+    "budget_plan": "💸 予算計画",
+
+    # Existing specific fields
+    "activities": "📋 活動内容",
+    "target_beneficiaries": "👥 支援対象",
+    "achievements": "🏆 成果・実績",
+    "strengths": "💪 強み",
+    "partnerships": "🤝 連携先",
+    "challenges": "⚠️ 課題",
+    "keywords": "🏷️ キーワード"
+})
+
+# Section groupings
+_SECTIONS: Final[Tuple[Tuple[str, Tuple[str, ...]], ...]] = (
+    ("団体詳細情報", ("org_name", "representative_name", "phone_number", "website_url", "email_address", "founding_year", "annual_budget", "organization_info", "contact_info", "staff_info", "finance_info")),
+    ("コア・アイデンティティ", ("primary_experience", "origin_story", "mission", "vision", "values")),
+    ("活動・組織力", ("activities", "target_beneficiaries", "achievements", "strengths", "partnerships", "challenges")),
+    ("プロジェクト構想", ("project_name", "project_plan", "activity_plan", "budget_plan")),
+    ("マッチング", ("keywords",)),
+)
+
+# _SECTIONS with labels resolved once: ((section_name, ((category, label), ...)), ...)
+_SECTIONS_RESOLVED: Final = tuple(
+    (name, tuple((cat, _CATEGORY_LABELS.get(cat, cat)) for cat in categories))
+    for name, categories in _SECTIONS
+)
+
+# Content-word tokens for resonance scoring: runs (2+ chars) of kanji, katakana, or Latin letters/digits.
+# Japanese text has no spaces, so str.split() would return whole sentences; splitting on
+# script boundaries approximates word segmentation (hiragana runs are mostly particles and
+# single kanji are mostly verb stems, so both are dropped).
+_TOKEN_RE = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff々]{2,}|[\u30a1-\u30ffー]{2,}|[a-z0-9]{2,}")
+
+def _normalize_text(text: str) -> str:
+    """NFKC-normalizes (full-width ASCII, half-width kana) and lower-cases text."""
+    return unicodedata.normalize("NFKC", text).lower()
+
+def _tokenize(text: str) -> Set[str]:
+    return set(_TOKEN_RE.findall(_normalize_text(text)))
+
+@lru_cache(maxsize=1024)
+def _parse_keywords(text: str) -> frozenset:
+    """Parses a comma-separated keywords insight into a normalized set."""
+    return frozenset(
+        k.strip()
+        for k in _normalize_text(text).split(",")
+        if k.strip()
+    )
+
+def _resonance_features(insights: Dict[str, Any]) -> Dict[str, Any]:
+    """Parses the insight fields used by resonance scoring into token sets."""
+    return {
+        "keywords": _parse_keywords(insights.get("keywords", "")),
+        "mission_words": _tokenize(insights.get("mission", "")),
+        "target_words": _tokenize(insights.get("target_beneficiaries", "")),
+    }
+
 class ProfileStorageBackend(ABC):
     """Abstract base class for profile storage strategies."""
+
+    # APPEND_ONLY_KEYS that load() leaves out; they are fetched with load_list() on first access
+    lazy_keys: tuple = ()
     
     @abstractmethod
     def load(self, user_id: str) -> Dict[str, Any]:
@@ -26,13 +189,50 @@ class ProfileStorageBackend(ABC):
     def save(self, user_id: str, data: Dict[str, Any]) -> None:
         pass
 
+    def commit(
+        self,
+        user_id: str,
+        data: Dict[str, Any],
+        document_dirty: bool,
+        appended: Dict[str, List[Any]],
+        replaced: Set[str]
+    ) -> None:
+        """
+        Persists a batch of pending changes.
+        
+        Args:
+            user_id: Profile owner
+            data: The full in-memory profile
+            document_dirty: True if non-append-only keys (e.g. insights) changed
+            appended: Records appended to each APPEND_ONLY_KEYS list since the last commit
+            replaced: APPEND_ONLY_KEYS lists that were rewritten wholesale (e.g. cleared)
+        
+        The default implementation rewrites the whole profile. Backends that can
+        append records incrementally override this.
+        """
+        self.save(user_id, data)
+
+    def load_list(self, user_id: str, key: str) -> List[Any]:
+        """Loads one of the lazy_keys lists. Only called for backends that declare lazy_keys."""
+        return []
+
+# LocalProfileStorage process-wide state: the file contents last read or written
+# (path -> ((mtime_ns, size), bytes)) and base directories known to exist. Contents are
+# cached rather than parsed dicts so every load() returns a profile of its own, and the
+# stamp makes a file changed on disk (by another process or by hand) be read again.
+_LOCAL_PROFILE_CACHE: Dict[str, Tuple[Tuple[int, int], bytes]] = {}
+_LOCAL_DIRS_READY: Set[str] = set()
+_LOCAL_STORAGE_LOCK = threading.RLock()
+
 class LocalProfileStorage(ProfileStorageBackend):
     """Stores profiles in local JSON files."""
     
     def __init__(self, base_dir: str = "profiles"):
         self.base_dir = base_dir
-        if not os.path.exists(self.base_dir):
-            os.makedirs(self.base_dir)
+        with _LOCAL_STORAGE_LOCK:
+            if base_dir not in _LOCAL_DIRS_READY:
+                os.makedirs(self.base_dir, exist_ok=True)
+                _LOCAL_DIRS_READY.add(base_dir)
 
     def _get_path(self, user_id: str) -> str:
         # Create a directory per user to keep things organized, or just a file
@@ -40,52 +240,183 @@ class LocalProfileStorage(ProfileStorageBackend):
 
     def load(self, user_id: str) -> Dict[str, Any]:
         path = self._get_path(user_id)
-        if os.path.exists(path):
+        with _LOCAL_STORAGE_LOCK:
             try:
-                with open(path, "r", encoding="utf-8") as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
+                st = os.stat(path)
+            except FileNotFoundError:
                 return {}
-        return {}
+            
+            cached = _LOCAL_PROFILE_CACHE.get(path)
+            if cached is not None and cached[0] == (st.st_mtime_ns, st.st_size):
+                content = cached[1]
+            else:
+                with open(path, "rb") as f:
+                    st = os.fstat(f.fileno())
+                    content = f.read()
+                _LOCAL_PROFILE_CACHE[path] = ((st.st_mtime_ns, st.st_size), content)
+        
+        try:
+            return _loads(content)
+        except ValueError:
+            # json.JSONDecodeError and orjson.JSONDecodeError both subclass ValueError
+            return {}
 
     def save(self, user_id: str, data: Dict[str, Any]) -> None:
         path = self._get_path(user_id)
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+        content = _dumps(data)
+        with _LOCAL_STORAGE_LOCK:
+            st = self._write(path, content)
+            _LOCAL_PROFILE_CACHE[path] = ((st.st_mtime_ns, st.st_size), content)
+
+    def _write(self, path: str, content: bytes) -> os.stat_result:
+        # Write to a temp file and swap it in so a crash never leaves a truncated profile
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        st = os.stat(tmp_path)
+        os.replace(tmp_path, path)
+        return st
+
+# storage.Client does credential resolution and HTTP session setup, so one client
+# (and one Bucket per name) is shared by every GCSProfileStorage in the process.
+_GCS_CLIENT = None
+_GCS_BUCKETS: Dict[str, Any] = {}
+_GCS_CLIENT_LOCK = threading.Lock()
+
+def _get_gcs_client():
+    global _GCS_CLIENT
+    with _GCS_CLIENT_LOCK:
+        if _GCS_CLIENT is None:
+            _GCS_CLIENT = storage.Client()
+        return _GCS_CLIENT
+
+def _get_gcs_bucket(bucket_name: str):
+    client = _get_gcs_client()
+    with _GCS_CLIENT_LOCK:
+        bucket = _GCS_BUCKETS.get(bucket_name)
+        if bucket is None:
+            bucket = _GCS_BUCKETS[bucket_name] = client.bucket(bucket_name)
+        return bucket
 
 class GCSProfileStorage(ProfileStorageBackend):
     """Stores profiles in Google Cloud Storage."""
 
+    lazy_keys = APPEND_ONLY_KEYS
+
     def __init__(self, bucket_name: str):
         if not storage:
             raise ImportError("google-cloud-storage is required for GCSProfileStorage")
-        self.client = storage.Client()
-        self.bucket = self.client.bucket(bucket_name)
+        self.client = _get_gcs_client()
+        self.bucket = _get_gcs_bucket(bucket_name)
+        # user_id -> APPEND_ONLY_KEYS still embedded in a legacy soul_profile.json
+        self._embedded_keys: Dict[str, Set[str]] = {}
 
     def _get_blob_name(self, user_id: str) -> str:
         return f"profiles/{user_id}/soul_profile.json"
 
+    def _get_list_blob_name(self, user_id: str, key: str) -> str:
+        # Append-only lists are stored as newline-delimited JSON next to the profile
+        return f"profiles/{user_id}/{key}.jsonl"
+
     def load(self, user_id: str) -> Dict[str, Any]:
         blob = self.bucket.blob(self._get_blob_name(user_id))
-        if blob.exists():
-            try:
-                content = blob.download_as_text()
-                return json.loads(content)
-            except Exception as e:
-                print(f"Error loading from GCS: {e}")
-                return {}
-        return {}
+        # Download directly instead of exists() + download: one round trip per load
+        try:
+            data = _loads_document(blob.download_as_bytes())
+        except NotFound:
+            data = {}
+        except Exception as e:
+            print(f"Error loading from GCS: {e}")
+            return {}
+        
+        # Append-only lists are not downloaded here; see load_list()
+        embedded = {key for key in APPEND_ONLY_KEYS if key in data}
+        if embedded:
+            # Legacy profile that still embeds the lists; they are moved out on the next commit
+            self._embedded_keys[user_id] = embedded
+        return data
+
+    def load_list(self, user_id: str, key: str) -> List[Any]:
+        blob = self.bucket.blob(self._get_list_blob_name(user_id, key))
+        try:
+            content = blob.download_as_bytes()
+            return [_loads(line) for line in content.splitlines() if line.strip()]
+        except NotFound:
+            return []
+        except Exception as e:
+            print(f"Error loading {key} from GCS: {e}")
+        return []
 
     def save(self, user_id: str, data: Dict[str, Any]) -> None:
+        """Writes the whole profile: the main document plus every append-only list it holds."""
+        for key in APPEND_ONLY_KEYS:
+            if key in data:
+                self._write_list(user_id, key, data[key])
+        self._embedded_keys.pop(user_id, None)
+        self._save_document(user_id, data)
+
+    def commit(
+        self,
+        user_id: str,
+        data: Dict[str, Any],
+        document_dirty: bool,
+        appended: Dict[str, List[Any]],
+        replaced: Set[str]
+    ) -> None:
+        legacy_keys = self._embedded_keys.pop(user_id, set())
+        if legacy_keys:
+            # One-time migration: move embedded lists into their own blobs
+            document_dirty = True
+            replaced = set(replaced) | legacy_keys
+        
+        for key in replaced:
+            self._write_list(user_id, key, data.get(key, []))
+        for key, records in appended.items():
+            if key not in replaced and records:
+                self._append_list(user_id, key, records)
+        if document_dirty:
+            self._save_document(user_id, data)
+
+    def _save_document(self, user_id: str, data: Dict[str, Any]) -> None:
         blob = self.bucket.blob(self._get_blob_name(user_id))
+        document = {k: v for k, v in data.items() if k not in APPEND_ONLY_KEYS}
         try:
+            # Stored gzip-compressed; GCS transcodes it back to plain JSON on download
+            blob.content_encoding = "gzip"
             blob.upload_from_string(
-                json.dumps(data, indent=4, ensure_ascii=False),
+                gzip.compress(_dumps(document, indent=False)),
                 content_type="application/json"
             )
         except Exception as e:
             print(f"Error saving to GCS: {e}")
 
+    def _write_list(self, user_id: str, key: str, records: List[Any]) -> None:
+        blob = self.bucket.blob(self._get_list_blob_name(user_id, key))
+        try:
+            blob.upload_from_string(_dump_records(records), content_type="application/x-ndjson")
+        except Exception as e:
+            print(f"Error saving {key} to GCS: {e}")
+
+    def _append_list(self, user_id: str, key: str, records: List[Any]) -> None:
+        """Appends records by composing a small temp blob onto the existing list blob."""
+        blob = self.bucket.blob(self._get_list_blob_name(user_id, key))
+        payload = _dump_records(records)
+        temp_blob = self.bucket.blob(f"{blob.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            temp_blob.upload_from_string(payload, content_type="application/x-ndjson")
+            try:
+                blob.compose([blob, temp_blob])
+            except NotFound:
+                # First record for this list: nothing to compose onto yet
+                blob.upload_from_string(payload, content_type="application/x-ndjson")
+        except Exception as e:
+            print(f"Error appending {key} to GCS: {e}")
+        finally:
+            try:
+                temp_blob.delete()
+            except Exception:
+                pass
+
 class ProfileManager:
     """
     Manages the 'Soul Profile' of the NPO representative.
@@ -114,6 +445,23 @@ class ProfileManager:
             self.storage = LocalProfileStorage()
             
         self._profile: Dict[str, Any] = self.storage.load(self.user_id)
+        # Pending-write state: mutations are flushed immediately, or once at the
+        # end of an enclosing transaction().
+        self._dirty = False
+        self._pending_appends: Dict[str, List[Any]] = {}
+        self._replaced_lists: Set[str] = set()
+        self._transaction_depth = 0
+        # get_profile_context() cache: (insights version, formatted string)
+        self._insights_version = 0
+        self._context_cache: Optional[tuple] = None
+        # calculate_resonance() cache: (insights version, parsed self-side features)
+        self._resonance_cache: Optional[tuple] = None
+        # Duplicate-check index for shown grants: (urls, lower-cased titles)
+        self._shown_grant_index: Optional[tuple] = None
+        # Lists the backend left out of load(); fetched on first access by _get_list()
+        self._unloaded_lists: Set[str] = set()
+        if isinstance(self.storage, ProfileStorageBackend):
+            self._unloaded_lists = set(self.storage.lazy_keys) - set(self._profile)
     
     def _init_gcs_storage(self):
         """Initialize GCS storage backend."""
@@ -125,8 +473,77 @@ class ProfileManager:
             self.storage = GCSProfileStorage(bucket_name)
 
     def save_profile(self) -> None:
-        """Saves the current profile to storage."""
-        self.storage.save(self.user_id, self._profile)
+        """
+        Marks the profile as modified and saves it to storage.
+        Inside a transaction() the write is deferred until the block exits.
+        """
+        self._dirty = True
+        self._request_flush()
+
+    def _get_list(self, key: str) -> List[Any]:
+        """Returns one of the APPEND_ONLY_KEYS lists, loading it from storage on first access."""
+        if key in self._unloaded_lists:
+            self._unloaded_lists.discard(key)
+            # Records appended before the first load have not necessarily been flushed yet
+            records = self.storage.load_list(self.user_id, key) + self._pending_appends.get(key, [])
+            if records:
+                self._profile[key] = records
+        return self._profile.get(key, [])
+
+    def _append_record(self, key: str, record: Dict[str, Any]) -> None:
+        """
+        Appends a record to one of the APPEND_ONLY_KEYS lists and saves it.
+        A list that has not been loaded yet is not fetched just to append to it.
+        """
+        if key not in self._unloaded_lists:
+            self._profile.setdefault(key, []).append(record)
+        self._pending_appends.setdefault(key, []).append(record)
+        self._request_flush()
+
+    def _replace_list(self, key: str, records: List[Any]) -> None:
+        """Replaces one of the APPEND_ONLY_KEYS lists wholesale and saves it."""
+        self._unloaded_lists.discard(key)
+        self._profile[key] = records
+        self._pending_appends.pop(key, None)
+        self._replaced_lists.add(key)
+        self._request_flush()
+
+    def _request_flush(self) -> None:
+        if self._transaction_depth == 0:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes pending changes to storage. Does nothing if the profile is clean."""
+        if not (self._dirty or self._pending_appends or self._replaced_lists):
+            return
+        if isinstance(self.storage, ProfileStorageBackend):
+            self.storage.commit(
+                self.user_id, self._profile, self._dirty,
+                self._pending_appends, self._replaced_lists
+            )
+        else:
+            self.storage.save(self.user_id, self._profile)
+        self._dirty = False
+        self._pending_appends = {}
+        self._replaced_lists = set()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Coalesces every mutation made inside the block into a single storage write.
+
+        Example:
+            with pm.transaction():
+                pm.add_to_history("user", message)
+                pm.add_to_history("agent", response)
+        """
+        self._transaction_depth += 1
+        try:
+            yield self
+        finally:
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0:
+                self.flush()
 
     def update_key_insight(self, category: str, content: str) -> None:
         """
@@ -140,90 +557,53 @@ class ProfileManager:
             self._profile["insights"] = {}
         
         self._profile["insights"][category] = content
+        self._insights_version += 1
         self.save_profile()
 
     def get_profile_context(self) -> str:
         """Returns a formatted string of the current profile for LLM context."""
+        # Rebuilt only when insights have changed since the last call
+        if self._context_cache and self._context_cache[0] == self._insights_version:
+            return self._context_cache[1]
+        context = self._build_profile_context()
+        self._context_cache = (self._insights_version, context)
+        return context
+
+    def _build_profile_context(self) -> str:
         if not self._profile.get("insights"):
             return "現在のプロファイル情報はありません。ゼロからインタビューを開始してください。"
         
         insights = self._profile.get("insights", {})
         
-        # Category labels in Japanese
-        # Category labels in Japanese
-        category_labels = {
-            # Core Identity & Origin
-            "primary_experience": "🌱 原体験",
-            "origin_story": "📖 創設ストーリー",
-            "mission": "🎯 ミッション",
-            "vision": "🌟 ビジョン",
-            "values": "💎 価値観",
-            
-            # Organization Details - Individual Fields
-            "org_name": "🏢 団体名",
-            "representative_name": "👤 代表者名",
-            "phone_number": "📞 連絡先電話番号",
-            "website_url": "🌐 ホームページ",
-            "email_address": "📧 メールアドレス",
-            "founding_year": "📅 設立年",
-            "annual_budget": "💰 年間予算",
-            
-            # Legacy organization info (for backward compatibility)
-            "organization_info": "🏢 団体基本情報",
-            "contact_info": "📞 連絡先情報",
-            "staff_info": "👥 スタッフ構成",
-            "finance_info": "💰 財務状況",
-            
-            # Project Concept
-            "project_name": "🚀 プロジェクト名",
-            "project_plan": "📝 プロジェクト計画",
-            "activity_plan": "📅 活動スケジュール",
-            "budget_plan": "💸 予算計画",
-            
-            # Existing specific fields
-            "activities": "📋 活動内容",
-            "target_beneficiaries": "👥 支援対象",
-            "achievements": "🏆 成果・実績",
-            "strengths": "💪 強み",
-            "partnerships": "🤝 連携先",
-            "challenges": "⚠️ 課題",
-            "keywords": "🏷️ キーワード"
-        }
-        
-        # Section groupings
-        sections = {
-            "団体詳細情報": ["org_name", "representative_name", "phone_number", "website_url", "email_address", "founding_year", "annual_budget", "organization_info", "contact_info", "staff_info", "finance_info"],
-            "コア・アイデンティティ": ["primary_experience", "origin_story", "mission", "vision", "values"],
-            "活動・組織力": ["activities", "target_beneficiaries", "achievements", "strengths", "partnerships", "challenges"],
-            "プロジェクト構想": ["project_name", "project_plan", "activity_plan", "budget_plan"],
-            "マッチング": ["keywords"]
-        }
-        
-        context = "【Soul Profile】\n\n"
+        parts: List[str] = ["【Soul Profile】\n\n"]
         
-        for section_name, categories in sections.items():
-            section_content = []
-            for cat in categories:
-                if cat in insights and insights[cat]:
-                    label = category_labels.get(cat, cat)
-                    section_content.append(f"**{label}**\n{insights[cat]}")
+        for section_name, categories in _SECTIONS_RESOLVED:
+            section_content = [
+                f"**{label}**\n{insights[cat]}"
+                for cat, label in categories
+                if insights.get(cat)
+            ]
             
             if section_content:
-                context += f"## {section_name}\n\n"
-                context += "\n\n".join(section_content)
-                context += "\n\n"
+                parts.append(f"## {section_name}\n\n")
+                parts.append("\n\n".join(section_content))
+                parts.append("\n\n")
         
         # Add any unlabeled insights
         for key, value in insights.items():
-            if key not in category_labels and value:
-                context += f"- {key}: {value}\n"
+            if key not in _CATEGORY_LABELS and value:
+                parts.append(f"- {key}: {value}\n")
         
-        return context.strip()
+        return "".join(parts).strip()
 
     
     def get_conversation_history(self) -> list:
-        """Returns the conversation history as a list of {role, content} dicts."""
-        return self._profile.get("conversation_history", [])
+        """
+        Returns the conversation history as a list of {role, content} dicts.
+        Once the history has been rolled up, the first entry is a 'system' digest
+        of the older turns.
+        """
+        return self._get_list("conversation_history")
     
     def add_to_history(self, role: str, content: str) -> None:
         """Adds a message to the conversation history.
@@ -232,25 +612,55 @@ class ProfileManager:
             role: Either 'user' or 'agent'
             content: The message content
         """
-        if "conversation_history" not in self._profile:
-            self._profile["conversation_history"] = []
+        with self.transaction():
+            self._append_record("conversation_history", {
+                "role": role,
+                "content": content
+            })
+            if len(self._get_list("conversation_history")) > MAX_LIVE_HISTORY:
+                self._roll_up_history()
+
+    def _roll_up_history(self) -> None:
+        """Moves the oldest live turns to history_archive and folds them into the digest entry."""
+        history = self._get_list("conversation_history")
+        digest = history[0] if history[0].get("role") == "system" else None
+        start = 1 if digest else 0
+        rolled = history[start:start + HISTORY_ROLLUP_SIZE]
         
-        self._profile["conversation_history"].append({
-            "role": role,
-            "content": content
-        })
-        self.save_profile()
+        lines = []
+        if digest:
+            lines.append(digest["content"][len(HISTORY_DIGEST_HEADER):])
+        for turn in rolled:
+            role_label = "ユーザー" if turn.get("role") == "user" else "エージェント"
+            text = turn.get("content", "").replace("\n", " ")
+            lines.append(f"{role_label}: {text[:100]}{'...' if len(text) > 100 else ''}")
+        
+        new_digest = {
+            "role": "system",
+            "content": HISTORY_DIGEST_HEADER + "\n".join(lines)[-HISTORY_DIGEST_MAX_CHARS:],
+            # Keeps get_turn_count() accurate after the user turns leave the live window
+            "user_turns": (digest.get("user_turns", 0) if digest else 0)
+                          + sum(1 for turn in rolled if turn.get("role") == "user")
+        }
+        
+        for turn in rolled:
+            self._append_record("history_archive", turn)
+        self._replace_list("conversation_history", [new_digest] + history[start + HISTORY_ROLLUP_SIZE:])
     
     def get_turn_count(self) -> int:
         """Returns the current turn number (number of user messages)."""
         history = self.get_conversation_history()
-        # Count only user turns
-        return sum(1 for turn in history if turn.get("role") == "user")
+        # Count only user turns, including those folded into the digest entry
+        return sum(
+            turn.get("user_turns", 0) if turn.get("role") == "system" else int(turn.get("role") == "user")
+            for turn in history
+        )
     
     def clear_history(self) -> None:
         """Clears the conversation history (for testing or reset)."""
-        self._profile["conversation_history"] = []
-        self.save_profile()
+        with self.transaction():
+            self._replace_list("conversation_history", [])
+            self._replace_list("history_archive", [])
 
     # ==================== PR/SNS情報管理 ====================
 
@@ -282,15 +692,11 @@ class ProfileManager:
         Saves a generated monthly summary to the profile history.
         """
         from datetime import datetime
-        if "monthly_summaries" not in self._profile:
-            self._profile["monthly_summaries"] = []
-            
         record = {
             "date": datetime.now().isoformat(),
             "summary": summary_text
         }
-        self._profile["monthly_summaries"].append(record)
-        self.save_profile()
+        self._append_record("monthly_summaries", record)
 
     # ==================== 助成金履歴管理 ====================
     
@@ -301,7 +707,7 @@ class ProfileManager:
         Returns:
             List of grant dictionaries with title, url, date_shown, etc.
         """
-        return self._profile.get("shown_grants", [])
+        return self._get_list("shown_grants")
     
     def add_shown_grant(self, grant: Dict[str, Any]) -> None:
         """
@@ -312,9 +718,6 @@ class ProfileManager:
         """
         from datetime import datetime
         
-        if "shown_grants" not in self._profile:
-            self._profile["shown_grants"] = []
-        
         # Add timestamp
         grant_record = {
             "title": grant.get("title", ""),
@@ -325,12 +728,14 @@ class ProfileManager:
         }
         
         # Check for duplicates by URL or title
-        existing_urls = [g.get("url", "") for g in self._profile["shown_grants"]]
-        existing_titles = [g.get("title", "").lower() for g in self._profile["shown_grants"]]
+        shown_urls, shown_titles = self._get_shown_grant_index()
+        url = grant_record["url"]
+        title = grant_record["title"].lower()
         
-        if grant_record["url"] not in existing_urls and grant_record["title"].lower() not in existing_titles:
-            self._profile["shown_grants"].append(grant_record)
-            self.save_profile()
+        if url not in shown_urls and title not in shown_titles:
+            self._append_record("shown_grants", grant_record)
+            shown_urls.add(url)
+            shown_titles.add(title)
     
     def is_grant_shown(self, grant: Dict[str, Any]) -> bool:
         """
@@ -342,20 +747,28 @@ class ProfileManager:
         Returns:
             True if the grant has already been shown
         """
-        shown_grants = self.get_shown_grants()
+        shown_urls, shown_titles = self._get_shown_grant_index()
         
         grant_url = grant.get("url", "")
         grant_title = grant.get("title", "").lower()
         
-        for shown in shown_grants:
-            # Check by URL
-            if grant_url and shown.get("url", "") == grant_url:
-                return True
-            # Check by title (fuzzy match)
-            if grant_title and shown.get("title", "").lower() == grant_title:
-                return True
+        # Check by URL, then by title (case-insensitive match)
+        if grant_url and grant_url in shown_urls:
+            return True
+        if grant_title and grant_title in shown_titles:
+            return True
         
         return False
+
+    def _get_shown_grant_index(self) -> tuple:
+        """Returns (urls, lower-cased titles) of shown grants, built once and kept in sync."""
+        if self._shown_grant_index is None:
+            shown_grants = self.get_shown_grants()
+            self._shown_grant_index = (
+                {g.get("url", "") for g in shown_grants},
+                {g.get("title", "").lower() for g in shown_grants},
+            )
+        return self._shown_grant_index
     
     def get_shown_grants_summary(self) -> str:
         """
@@ -369,7 +782,7 @@ class ProfileManager:
         if not shown_grants:
             return "まだ提案済みの助成金はありません。"
         
-        summary = f"📋 **提案済み助成金一覧** ({len(shown_grants)}件)\n\n"
+        parts = [f"📋 **提案済み助成金一覧** ({len(shown_grants)}件)\n\n"]
         
         for i, grant in enumerate(shown_grants, 1):
             title = grant.get("title", "タイトル不明")
@@ -378,20 +791,20 @@ class ProfileManager:
             score = grant.get("resonance_score", "")
             date_shown = grant.get("date_shown", "")[:10]  # YYYY-MM-DD
             
-            summary += f"**{i}. {title}**\n"
+            parts.append(f"**{i}. {title}**\n")
             if url:
-                summary += f"   🔗 URL: {url}\n"
-            summary += f"   💰 金額: {amount}\n"
+                parts.append(f"   🔗 URL: {url}\n")
+            parts.append(f"   💰 金額: {amount}\n")
             if score:
-                summary += f"   🎯 共鳴度: {score}/100\n"
-            summary += f"   📅 提案日: {date_shown}\n\n"
+                parts.append(f"   🎯 共鳴度: {score}/100\n")
+            parts.append(f"   📅 提案日: {date_shown}\n\n")
         
-        return summary
+        return "".join(parts)
     
     def clear_shown_grants(self) -> None:
         """Clears the shown grants history."""
-        self._profile["shown_grants"] = []
-        self.save_profile()
+        self._replace_list("shown_grants", [])
+        self._shown_grant_index = None
 
     # ==================== NPO共鳴マッチング ====================
     
@@ -409,36 +822,100 @@ class ProfileManager:
             return profiles
         
         try:
-            # List all blobs in profiles/ prefix
-            blobs = self.storage.bucket.list_blobs(prefix="profiles/")
+            bucket = self.storage.bucket
+            now = time.monotonic()
+            with _PROFILE_CACHE_LOCK:
+                listing = _PROFILE_LIST_CACHE.get(bucket.name)
+            
+            if listing and listing[0] > now:
+                # Listed recently: skip GCS entirely for this call
+                entries = listing[1]
+            else:
+                # List all blobs in profiles/ prefix
+                entries = []
+                for blob in bucket.list_blobs(prefix="profiles/"):
+                    if blob.name.endswith("soul_profile.json"):
+                        # Extract user_id from path: profiles/{user_id}/soul_profile.json
+                        parts = blob.name.split("/")
+                        if len(parts) >= 2:
+                            entries.append((parts[1], blob))
+                with _PROFILE_CACHE_LOCK:
+                    _PROFILE_LIST_CACHE[bucket.name] = (now + PROFILE_LIST_TTL_SECONDS, entries)
             
-            for blob in blobs:
-                if blob.name.endswith("soul_profile.json"):
-                    # Extract user_id from path: profiles/{user_id}/soul_profile.json
-                    parts = blob.name.split("/")
-                    if len(parts) >= 2:
-                        user_id = parts[1]
-                        if user_id != self.user_id:  # Exclude self
-                            try:
-                                content = blob.download_as_text()
-                                profile_data = json.loads(content)
-                                profiles.append({
-                                    "user_id": user_id,
-                                    "profile": profile_data
-                                })
-                            except Exception as e:
-                                logging.error(f"[PROFILE] Error loading profile {user_id}: {e}")
+            targets = [(user_id, blob) for user_id, blob in entries if user_id != self.user_id]  # Exclude self
+            
+            # The listing already carries each blob's generation, so unchanged
+            # profiles are served from the cache without a metadata round trip.
+            loaded: Dict[str, Dict[str, Any]] = {}
+            stale = []
+            with _PROFILE_CACHE_LOCK:
+                for user_id, blob in targets:
+                    cached = _PROFILE_CACHE.get(blob.name)
+                    if cached and blob.generation is not None and cached[0] == blob.generation:
+                        _PROFILE_CACHE.move_to_end(blob.name)
+                        loaded[user_id] = cached[1:]
+                    else:
+                        stale.append((user_id, blob))
+            
+            # Download and parse on the pool threads: network waits overlap, and orjson
+            # parsing runs alongside the remaining downloads instead of serially afterwards.
+            def _fetch(target):
+                user_id, blob = target
+                try:
+                    profile_data = _loads_document(blob.download_as_bytes())
+                except Exception as e:
+                    logging.error(f"[PROFILE] Error loading profile {user_id}: {e}")
+                    return user_id, blob, None, None
+                # Parse resonance features once per downloaded generation
+                return user_id, blob, profile_data, _resonance_features(profile_data.get("insights", {}))
+            
+            results = []
+            if stale:
+                with ThreadPoolExecutor(max_workers=min(PROFILE_FETCH_WORKERS, len(stale))) as executor:
+                    results = list(executor.map(_fetch, stale))
+            
+            with _PROFILE_CACHE_LOCK:
+                for user_id, blob, profile_data, features in results:
+                    if profile_data is None:
+                        continue
+                    loaded[user_id] = (profile_data, features)
+                    _PROFILE_CACHE[blob.name] = (blob.generation, profile_data, features)
+                    _PROFILE_CACHE.move_to_end(blob.name)
+                while len(_PROFILE_CACHE) > PROFILE_CACHE_MAX_ENTRIES:
+                    _PROFILE_CACHE.popitem(last=False)
+            
+            # Keep listing order
+            for user_id, _ in targets:
+                if user_id in loaded:
+                    profile_data, features = loaded[user_id]
+                    profiles.append({
+                        "user_id": user_id,
+                        "profile": profile_data,
+                        "resonance_features": features
+                    })
         except Exception as e:
             logging.error(f"[PROFILE] Error listing profiles: {e}")
         
         return profiles
     
-    def calculate_resonance(self, other_profile: Dict[str, Any]) -> Dict[str, Any]:
+    def _get_resonance_features(self) -> Dict[str, Any]:
+        """Returns this profile's parsed resonance features, re-parsed only after an insight edit."""
+        if not self._resonance_cache or self._resonance_cache[0] != self._insights_version:
+            features = _resonance_features(self._profile.get("insights", {}))
+            self._resonance_cache = (self._insights_version, features)
+        return self._resonance_cache[1]
+
+    def calculate_resonance(
+        self,
+        other_profile: Dict[str, Any],
+        other_features: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """
         Calculates resonance score between this profile and another.
         
         Args:
             other_profile: The other NPO's profile data
+            other_features: Pre-parsed resonance features of other_profile (from list_all_profiles)
             
         Returns:
             Dict with resonance score and breakdown
@@ -449,47 +926,31 @@ class ProfileManager:
         if not my_insights or not other_insights:
             return {"score": 0, "reason": "プロファイル情報が不足しています"}
         
-        # Calculate keyword overlap
-        my_keywords = set(
-            k.strip().lower() 
-            for k in my_insights.get("keywords", "").split(",") 
-            if k.strip()
-        )
-        other_keywords = set(
-            k.strip().lower() 
-            for k in other_insights.get("keywords", "").split(",") 
-            if k.strip()
-        )
+        # Self-side features are parsed once and reused across every other NPO
+        mine = self._get_resonance_features()
+        other = other_features or _resonance_features(other_insights)
         
-        keyword_overlap = len(my_keywords & other_keywords)
+        # Calculate keyword overlap
+        common = mine["keywords"] & other["keywords"]
+        keyword_overlap = len(common)
         keyword_score = min(keyword_overlap * 15, 40)  # Max 40 points
         
-        # Check mission alignment
-        my_mission = my_insights.get("mission", "").lower()
-        other_mission = other_insights.get("mission", "").lower()
-        
+        # Check mission alignment (simple word overlap check)
         mission_score = 0
-        if my_mission and other_mission:
-            # Simple word overlap check
-            my_words = set(my_mission.split())
-            other_words = set(other_mission.split())
-            common_words = len(my_words & other_words)
+        if mine["mission_words"] and other["mission_words"]:
+            common_words = len(mine["mission_words"] & other["mission_words"])
             if common_words >= 3:
                 mission_score = 30
             elif common_words >= 1:
                 mission_score = 15
         
         # Check target beneficiaries alignment
-        my_target = my_insights.get("target_beneficiaries", "").lower()
-        other_target = other_insights.get("target_beneficiaries", "").lower()
-        
         target_score = 0
-        if my_target and other_target:
-            my_words = set(my_target.split())
-            other_words = set(other_target.split())
-            if len(my_words & other_words) >= 2:
+        if mine["target_words"] and other["target_words"]:
+            common_words = len(mine["target_words"] & other["target_words"])
+            if common_words >= 2:
                 target_score = 20
-            elif len(my_words & other_words) >= 1:
+            elif common_words >= 1:
                 target_score = 10
         
         # Check strengths complementarity
@@ -500,7 +961,6 @@ class ProfileManager:
         # Build reason
         reasons = []
         if keyword_overlap > 0:
-            common = my_keywords & other_keywords
             reasons.append(f"共通キーワード: {', '.join(list(common)[:3])}")
         if mission_score > 0:
             reasons.append("ミッションに共通点あり")
@@ -534,7 +994,7 @@ class ProfileManager:
         resonance_results = []
         for profile_info in all_profiles:
             other_profile = profile_info["profile"]
-            resonance = self.calculate_resonance(other_profile)
+            resonance = self.calculate_resonance(other_profile, profile_info.get("resonance_features"))
             
             if resonance["score"] >= min_score:
                 resonance_results.append({
@@ -550,7 +1010,7 @@ class ProfileManager:
             return f"⚠️ 共鳴度{min_score}以上のNPOは見つかりませんでした。\n\n{len(all_profiles)}件のプロファイルを検索しましたが、あなたのNPOと十分な共通点を持つ団体は見つかりませんでした。"
         
         # Build result
-        result = f"# 🤝 共鳴するNPO ({len(resonance_results)}件)\n\n"
+        parts = [f"# 🤝 共鳴するNPO ({len(resonance_results)}件)\n\n"]
         
         for i, item in enumerate(resonance_results[:5], 1):  # Top 5
             other_insights = item["profile"].get("insights", {})
@@ -560,13 +1020,13 @@ class ProfileManager:
             mission = other_insights.get("mission", "ミッション未設定")
             activities = other_insights.get("activities", "")
             
-            result += f"## {i}. 共鳴度: {resonance['score']}/100\n\n"
-            result += f"**🎯 ミッション**: {mission[:100]}{'...' if len(mission) > 100 else ''}\n\n"
+            parts.append(f"## {i}. 共鳴度: {resonance['score']}/100\n\n")
+            parts.append(f"**🎯 ミッション**: {mission[:100]}{'...' if len(mission) > 100 else ''}\n\n")
             if activities:
-                result += f"**📋 活動内容**: {activities[:100]}{'...' if len(activities) > 100 else ''}\n\n"
-            result += f"**💫 共鳴理由**: {resonance['reason']}\n\n"
-            result += "---\n\n"
+                parts.append(f"**📋 活動内容**: {activities[:100]}{'...' if len(activities) > 100 else ''}\n\n")
+            parts.append(f"**💫 共鳴理由**: {resonance['reason']}\n\n")
+            parts.append("---\n\n")
         
-        result += "*共鳴度は、キーワード・ミッション・支援対象の類似性から算出しています。*"
+        parts.append("*共鳴度は、キーワード・ミッション・支援対象の類似性から算出しています。*")
         
-        return result
+        return "".join(parts)
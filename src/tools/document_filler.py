@@ -4,11 +4,464 @@ Document Filler - Excel/Wordフォーマットにドラフト内容を入力す
 Cloud Run（Linux）対応。openpyxlとpython-docxを使用。
 """
 
+import bisect
+import io
+import itertools
 import logging
 import os
+import posixpath
+import re
 import shutil
-from typing import Any, Dict, List, Optional, Tuple
-from datetime import datetime
+import sys
+import tempfile
+import threading
+import time
+import weakref
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from operator import itemgetter
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+from datetime import datetime, timezone
+from functools import lru_cache, wraps
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+try:
+    import openpyxl
+    from openpyxl.comments import Comment
+    _HAS_XL = True
+except ImportError:
+    openpyxl = None
+    _HAS_XL = False
+
+try:
+    from docx import Document
+    from docx.document import _Body
+    from docx.opc.constants import RELATIONSHIP_TYPE as RT
+    from docx.oxml import parse_xml
+    from docx.shared import Pt, RGBColor
+    from docx.text.run import Run
+    _HAS_DOCX = True
+except ImportError:
+    Document = None
+    _HAS_DOCX = False
+
+
+# 懸念点コメントの作成者名（全コメントで同じ文字列を共有する）
+_COMMENT_AUTHOR = sys.intern("Shadow Director AI")
+_COMMENT_INITIALS = "SD"
+
+# 懸念点タイプの表示ラベル
+_CONCERN_TYPE_LABELS: Mapping[str, str] = MappingProxyType({
+    "missing_info": "⚠️ 情報不足",
+    "uncertain": "❓ 要確認",
+    "length_exceeded": "📏 文字数超過",
+    "truncated": "✂️ 回答省略",
+})
+_DEFAULT_CONCERN_LABEL = "⚠️ 懸念あり"
+# Excel/Wordコメント本文のひな形（作者名は定数から一度だけ埋め込む）
+_CONCERN_COMMENT_TEMPLATE = (
+    "【{label}】\n"
+    "項目: {name}\n"
+    "理由: {reason}\n"
+    "\n"
+    "※ 内容をご確認のうえ、必要に応じて修正してください。\n"
+    "(自動生成: " + _COMMENT_AUTHOR + ")"
+)
+
+# Word段落の入力パターン検出用
+# 全角の下線・括弧・コロン・空白を半角に1文字ずつ畳み込む（文字位置は変わらない）
+_ZEN2HAN = str.maketrans({'＿': '_', '（': '(', '）': ')', '：': ':', '　': ' '})
+# 以下3つは _ZEN2HAN で畳み込んだテキストに対して使う
+_UNDERLINE_RE = re.compile(r'_{3,}')
+_UNDERLINE_SHORT_RE = re.compile(r'_{2,}')
+# 括弧プレースホルダー（空括弧とヒント付き括弧の両方。区別は _subn_brackets で行う）
+_BRACKET_RE = re.compile(r'\([^)]*\)')
+_COLON_END_RE = re.compile(r'^(.+?[:：])\s*$')
+_COLON_SPLIT_RE = re.compile(r'^(.+?[:：])\s*(.*)$')
+_BRACKET_ONLY_RE = re.compile(r'^[（(].+[)）]$')
+# 上記パターンのいずれかが当たりうる文字（下線・開き括弧・コロン、畳み込み後）
+_PARAGRAPH_MARKER_RE = re.compile(r'[_(:]')
+
+# field_id の形式（Excel: "シート名_行_列" / Word: "tableN_行_列", "para_N"）
+_EXCEL_FIELD_RE = re.compile(r'^(.+)_(\d+)_(\d+)$')
+# ワークシートの最大行・最大列（1048576行 / XFD列）
+_XL_MAX_ROW = 1048576
+_XL_MAX_COL = 16384
+# openpyxlがエラー値（t="e"）として書き込む文字列
+_XL_ERROR_CODES = frozenset(('#NULL!', '#DIV/0!', '#VALUE!', '#REF!', '#NAME?', '#NUM!', '#N/A'))
+# セルに書き込める文字列の最大長（openpyxlと同じく超えた分は切り捨てる）
+_XL_MAX_STRING_LENGTH = 32767
+_WORD_PARA_FIELD_RE = re.compile(r'^para_(\d+)$')
+
+# document.xml.rels のリレーションシップID
+_RID_RE = re.compile(rb'Id="rId(\d+)"')
+
+# WordprocessingML（.docx）のXML名前空間
+_W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_QN_W_PPR = f"{{{_W_NS}}}pPr"
+_QN_W_R = f"{{{_W_NS}}}r"
+_QN_W_ID = f"{{{_W_NS}}}id"
+_QN_W_VAL = f"{{{_W_NS}}}val"
+_QN_W_AUTHOR = f"{{{_W_NS}}}author"
+_QN_W_DATE = f"{{{_W_NS}}}date"
+_QN_W_INITIALS = f"{{{_W_NS}}}initials"
+
+# スタイル付きrunのテンプレート（python-docxのadd_run + font設定と同じ構造）
+_RUN_TEMPLATE = '<w:r xmlns:w="' + _W_NS + '">{rpr}{content}</w:r>'
+# comments.xmlのルート（Wordが出力するcomments.xmlと同じ名前空間を宣言しておく）
+_COMMENTS_ROOT_XML = (
+    '<w:comments'
+    ' xmlns:w="' + _W_NS + '"'
+    ' xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+    ' xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006"'
+    ' xmlns:w14="http://schemas.microsoft.com/office/word/2010/wordml"/>'
+)
+# コメント範囲・参照マーカー（w:p は取り出し用の入れ物で、子要素だけを段落へ移す）
+_COMMENT_MARKERS_TEMPLATE = (
+    '<w:p xmlns:w="' + _W_NS + '">'
+    '<w:commentRangeStart w:id="{cid}"/>'
+    '<w:commentRangeEnd w:id="{cid}"/>'
+    '<w:r><w:rPr><w:sz w:val="16"/><w:szCs w:val="16"/></w:rPr>'
+    '<w:commentReference w:id="{cid}"/></w:r>'
+    '</w:p>'
+)
+# コメント本体（w:comment）と、その中の1行分の段落
+_COMMENT_TEMPLATE = (
+    '<w:comment w:id="{cid}" w:author="' + _COMMENT_AUTHOR + '"'
+    ' w:date="{date}" w:initials="' + _COMMENT_INITIALS + '">{paragraphs}</w:comment>'
+)
+# 複数のw:commentを1回でパースするための入れ物
+_COMMENTS_FRAGMENT_TEMPLATE = '<w:comments xmlns:w="' + _W_NS + '">{comments}</w:comments>'
+_COMMENT_LINE_TEMPLATE = (
+    '<w:p><w:pPr/><w:r><w:rPr><w:lang w:val="ja-JP"/></w:rPr>'
+    '<w:t xml:space="preserve">{text}</w:t></w:r></w:p>'
+)
+_COMMENT_BLANK_LINE = '<w:p><w:pPr/></w:p>'
+# XML 1.0で使えない文字（lxmlのテキスト設定と同じくコメント本文では受け付けない）
+_XML_INVALID_CHAR_RE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]')
+# テキストノード / 属性値のエスケープ表（&<>を含まない大半の日本語テキストはそのまま返す）
+_XML_TEXT_ESCAPES = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '\r': '&#13;'})
+_XML_ATTR_ESCAPES = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'})
+# run内でw:tab / w:brになる文字
+_RUN_BREAK_RE = re.compile(r'(\t|[\r\n])')
+
+# SpreadsheetML（.xlsx）のXML名前空間
+_XL_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_XL_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_QN_XL_SHEET = f"{{{_XL_NS}}}sheet"
+_QN_XL_SHEET_DATA = f"{{{_XL_NS}}}sheetData"
+_QN_XL_ROW = f"{{{_XL_NS}}}row"
+_QN_XL_C = f"{{{_XL_NS}}}c"
+_QN_XL_F = f"{{{_XL_NS}}}f"
+_QN_XL_V = f"{{{_XL_NS}}}v"
+_QN_XL_IS = f"{{{_XL_NS}}}is"
+_QN_XL_T = f"{{{_XL_NS}}}t"
+_QN_XL_CALC_PR = f"{{{_XL_NS}}}calcPr"
+_QN_XL_R_ID = f"{{{_XL_REL_NS}}}id"
+_XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+if etree is not None:
+    # 要素作成用（作成のたびにタグ文字列から名前空間を切り出さないよう分解済みの名前を使う）
+    _QNAME_XL_ROW = etree.QName(_QN_XL_ROW)
+    _QNAME_XL_C = etree.QName(_QN_XL_C)
+    _QNAME_XL_V = etree.QName(_QN_XL_V)
+    _QNAME_XL_F = etree.QName(_QN_XL_F)
+    _QNAME_XL_IS = etree.QName(_QN_XL_IS)
+    _QNAME_XL_T = etree.QName(_QN_XL_T)
+    _QNAME_XL_CALC_PR = etree.QName(_QN_XL_CALC_PR)
+
+# workbook.xml内でcalcPrより前に置かれる要素（スキーマ上の順序）
+_XL_CALC_PR_PRECEDING = tuple(
+    f"{{{_XL_NS}}}{tag}" for tag in ("sheets", "functionGroups", "externalReferences", "definedNames")
+)
+
+
+@lru_cache(maxsize=4096)
+def _parse_excel_field_id(field_id: str) -> Optional[Tuple[str, int, int]]:
+    """
+    Excelのfield_id "シート名_行_列" を (シート名, 行, 列) にする。
+    形式が違う場合や、行・列がワークシートの範囲（1〜1048576行, 1〜16384列）外の場合はNone
+    """
+    m = _EXCEL_FIELD_RE.match(field_id)
+    if m is None:
+        return None
+    sheet_name, row_s, col_s = m.groups()
+    row, col = int(row_s), int(col_s)
+    if not (1 <= row <= _XL_MAX_ROW and 1 <= col <= _XL_MAX_COL):
+        return None
+    return sheet_name, row, col
+
+
+@lru_cache(maxsize=4096)
+def _parse_table_field_id(field_id: str) -> Optional[Tuple[int, int, int]]:
+    """Wordのfield_id "tableN_行_列" を (テーブル番号, 行, 列) にする。形式が違えばNone"""
+    try:
+        table_part, row_s, col_s = field_id.rsplit('_', 2)
+    except ValueError:
+        return None
+    table_s = table_part[5:]
+    if not (table_part.startswith("table") and table_s.isdecimal() and row_s.isdecimal() and col_s.isdecimal()):
+        return None
+    return int(table_s), int(row_s), int(col_s)
+
+
+@lru_cache(maxsize=4096)
+def _parse_para_field_id(field_id: str) -> int:
+    """
+    Wordのfield_id "para_N" から段落番号を取り出す。
+    
+    Raises:
+        ValueError: 形式が違う場合
+    """
+    m = _WORD_PARA_FIELD_RE.match(field_id)
+    if m is None:
+        raise ValueError(f"Invalid field_id format: {field_id}")
+    return int(m.group(1))
+
+
+def _subn_folded(pattern, replacement: str, text: str, folded: Optional[str] = None) -> Tuple[str, int]:
+    """
+    _ZEN2HAN で畳み込んだテキストでマッチし、元のテキストの同じ位置を置換する。
+    
+    畳み込みは1文字→1文字なので位置がそのまま使え、置換箇所以外の全角文字は残る。
+    replacement はそのまま挿入する（re.sub と違い後方参照は解釈しない）。
+    """
+    if folded is None:
+        folded = text.translate(_ZEN2HAN)
+    return _replace_spans(text, [m.span() for m in pattern.finditer(folded)], replacement)
+
+
+def _subn_brackets(replacement: str, text: str, folded: Optional[str] = None) -> Tuple[str, int]:
+    """
+    括弧プレースホルダーを置換する（_subn_folded と同じく畳み込んだテキストでマッチする）。
+    
+    空括弧「（　）」があればそれだけを、なければヒント付き括弧「（入力してください）」を
+    すべて置換する。どちらの位置も1回の走査で集める。
+    """
+    if folded is None:
+        folded = text.translate(_ZEN2HAN)
+    empty_spans = []
+    hint_spans = []
+    for m in _BRACKET_RE.finditer(folded):
+        start, end = m.span()
+        # 「((　)」のように開き括弧が続く場合、空括弧は最後の開き括弧から始まる
+        open_idx = folded.rfind('(', start, end)
+        if not folded[open_idx + 1:end - 1].strip():
+            empty_spans.append((open_idx, end))
+        hint_spans.append((start, end))
+    return _replace_spans(text, empty_spans or hint_spans, replacement)
+
+
+def _replace_spans(text: str, spans: List[Tuple[int, int]], replacement: str) -> Tuple[str, int]:
+    """text の各区間（昇順・重なりなし）を replacement に置き換え、(新しいテキスト, 置換数) を返す"""
+    if not spans:
+        return text, 0
+    pieces = []
+    last = 0
+    for start, end in spans:
+        pieces.append(text[last:start])
+        pieces.append(replacement)
+        last = end
+    pieces.append(text[last:])
+    return ''.join(pieces), len(spans)
+
+
+@lru_cache(maxsize=512)
+def _build_concern_comment(concern_type: str, concern_reason: str, field_name: str) -> str:
+    """懸念点コメントの本文を作る（同じ懸念理由が多くのフィールドで繰り返されるためキャッシュする）"""
+    return _CONCERN_COMMENT_TEMPLATE.format(
+        label=_CONCERN_TYPE_LABELS.get(concern_type, _DEFAULT_CONCERN_LABEL),
+        name=field_name,
+        reason=concern_reason,
+    )
+
+
+def _escape_xml_text(text: str) -> str:
+    """テキストノード用にエスケープする（CRは改行の正規化で消えないよう文字参照にする）"""
+    if '&' not in text and '<' not in text and '>' not in text and '\r' not in text:
+        return text
+    return text.translate(_XML_TEXT_ESCAPES)
+
+
+def _escape_xml_attr(value: str) -> str:
+    """ダブルクォートで囲む属性値用にエスケープする"""
+    if '&' not in value and '<' not in value and '>' not in value and '"' not in value:
+        return value
+    return value.translate(_XML_ATTR_ESCAPES)
+
+
+def _comment_timestamp() -> str:
+    """Wordコメントのw:date（UTC）"""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+@lru_cache(maxsize=512)
+def _comment_paragraphs_xml(comment_text: str) -> str:
+    """
+    コメント本文を段落のXML文字列にする（改行ごとに段落、空行はw:pPrのみ）。
+    本文は _build_concern_comment のキャッシュから同じ文字列が繰り返し来るため、結果もキャッシュする。
+    """
+    return ''.join(
+        _COMMENT_LINE_TEMPLATE.format(text=_escape_xml_text(line)) if line.strip() else _COMMENT_BLANK_LINE
+        for line in comment_text.split('\n')
+    )
+
+
+def _comment_xml(comment_id: str, comment_text: str, date: str) -> str:
+    """コメント本体（w:comment）のXML文字列を作る"""
+    return _COMMENT_TEMPLATE.format(
+        cid=_escape_xml_attr(comment_id),
+        date=date,
+        paragraphs=_comment_paragraphs_xml(comment_text),
+    )
+
+
+def _run_properties_xml(style: Optional[Dict]) -> str:
+    """フォントスタイル辞書からw:rPrのXML文字列を作る（指定がなければ空文字）"""
+    if not style:
+        return ""
+    props = []
+    if style.get("font_name"):
+        name = _escape_xml_attr(style["font_name"])
+        props.append(f'<w:rFonts w:ascii="{name}" w:hAnsi="{name}"/>')
+    if style.get("bold") is not None:
+        props.append("<w:b/>" if style["bold"] else '<w:b w:val="0"/>')
+    if style.get("italic") is not None:
+        props.append("<w:i/>" if style["italic"] else '<w:i w:val="0"/>')
+    if style.get("font_size"):
+        props.append(f'<w:sz w:val="{int(style["font_size"].pt * 2)}"/>')
+    return f"<w:rPr>{''.join(props)}</w:rPr>" if props else ""
+
+
+def _run_content_xml(text: str) -> str:
+    """テキストをrunの内容（w:t / w:tab / w:br）のXML文字列にする"""
+    parts = []
+    for piece in _RUN_BREAK_RE.split(text):
+        if piece == "\t":
+            parts.append("<w:tab/>")
+        elif piece in ("\r", "\n"):
+            parts.append("<w:br/>")
+        elif piece:
+            space = ' xml:space="preserve"' if len(piece.strip()) < len(piece) else ""
+            parts.append(f"<w:t{space}>{_escape_xml_text(piece)}</w:t>")
+    return "".join(parts)
+
+
+def _column_letter(col: int) -> str:
+    """列番号（1始まり）をExcelの列記号（A, B, ..., AA）に変換する。"""
+    letters = ""
+    while col > 0:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _column_index(ref: str) -> int:
+    """セル参照（"B5"等）から列番号（1始まり）を取り出す。"""
+    idx = 0
+    for ch in ref:
+        if "A" <= ch <= "Z":
+            idx = idx * 26 + ord(ch) - 64
+        else:
+            break
+    return idx
+
+
+@dataclass
+class _FieldSpec:
+    """fill_excel / fill_word に渡された1フィールド分の入力（新形式の辞書と旧形式の文字列を揃えたもの）"""
+    field_id: str
+    value: Any
+    field_name: str
+    concern_type: str = "none"
+    concern_reason: str = ""
+    input_pattern: str = "inline"
+    location: Dict[str, Any] = field(default_factory=dict)
+    input_length_type: str = "unknown"
+    
+    @property
+    def has_concern(self) -> bool:
+        """コメントを付ける必要がある（懸念点付きの）フィールドか"""
+        return self.concern_type != "none" and bool(self.concern_reason)
+
+
+def _normalize_field_values(field_values: Dict[str, Any]) -> List[_FieldSpec]:
+    """
+    field_values を _FieldSpec のリストにする（値が空のフィールドは含めない）。
+    
+    新形式: {field_id: {"value": ..., "concern_type": ..., ...}}
+    旧形式: {field_id: 値}
+    """
+    specs = []
+    for field_id, field_data in field_values.items():
+        if isinstance(field_data, dict):
+            value = field_data.get("value", "")
+            if not value:
+                continue
+            specs.append(_FieldSpec(
+                field_id=field_id,
+                value=value,
+                field_name=field_data.get("field_name", field_id),
+                concern_type=field_data.get("concern_type", "none"),
+                concern_reason=field_data.get("concern_reason", ""),
+                input_pattern=field_data.get("input_pattern", "inline"),
+                location=field_data.get("location", {}),
+                input_length_type=field_data.get("input_length_type", "unknown"),
+            ))
+        elif field_data:
+            specs.append(_FieldSpec(field_id=field_id, value=field_data, field_name=field_id))
+    return specs
+
+
+def _log_slow_call(method):
+    """
+    DocumentFillerのメソッドの所要時間を測り、SLOW_CALL_LOG_SECONDSを超えたらログに出す。
+    
+    入力処理はXMLのパースとZIPの読み書きが大半を占めるため、
+    どの呼び出しが遅いかを本番のログで確認できるようにしておく。
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            if elapsed > self.SLOW_CALL_LOG_SECONDS:
+                self.logger.info("[DOC_FILLER][perf] %s took %.0fms", method.__name__, elapsed * 1000)
+    return wrapper
+
+
+class _WordDocumentXml:
+    """
+    word/document.xml だけを読み込んだ軽量なWordドキュメント。
+    
+    python-docxのDocumentのうち、入力処理で使う paragraphs / tables だけを
+    同じ順序・同じプロキシ型で提供する。スタイルやリレーションシップを持つ
+    パッケージは読み込まないため part は None。
+    """
+    
+    def __init__(self, element):
+        self.element = element
+        self._body = _Body(element.body, self)
+    
+    @property
+    def part(self):
+        return None
+    
+    @property
+    def paragraphs(self):
+        return self._body.paragraphs
+    
+    @property
+    def tables(self):
+        return self._body.tables
 
 
 class DocumentFiller:
@@ -17,17 +470,47 @@ class DocumentFiller:
     Cloud Run（Linux）対応。
     """
     
-    def __init__(self, output_dir: str = None):
+    # Word本文パーツのZIP内パス
+    WORD_DOCUMENT_PART = "word/document.xml"
+    # docx / xlsx再書き込み時のバッファサイズ（変更しないパーツのコピーと出力ファイルの書き込み）
+    ZIP_COPY_BUFFER_SIZE = 1024 * 1024
+    # docx再書き込み時に内容を書き換えるパーツの圧縮レベル（XMLは1でも6とほぼ同じ圧縮率）
+    ZIP_COMPRESS_LEVEL = 1
+    
+    # fill_batch / cleanup_old_files の並列数上限
+    BATCH_MAX_WORKERS = os.cpu_count() or 1
+    
+    # この秒数を超えた fill_document / cleanup_old_files の呼び出しは所要時間をログに出す
+    SLOW_CALL_LOG_SECONDS = 0.5
+    
+    def __init__(self, output_dir: str = None, use_lxml_fast_path: bool = True):
         """
         Args:
             output_dir: 出力ディレクトリ（デフォルト: /tmp/filled_documents）
+            use_lxml_fast_path: Word入力時にword/document.xmlだけを読み書きするか
+                （Falseならpython-docxでパッケージ全体を読み込んで保存する）
         """
         self.output_dir = output_dir or "/tmp/filled_documents"
+        self.use_lxml_fast_path = use_lxml_fast_path
         self.logger = logging.getLogger(__name__)
         
+        # スレッドごとの作業領域（fill_batchで複数ファイルを並行して入力するため）
+        self._local = threading.local()
+        
+        # 本文パーツ -> 既存のcomments.xmlのルート要素（なければNone）。リレーションシップの走査は1回だけ
+        self._comments_part_cache = weakref.WeakKeyDictionary()
+        
         # 出力ディレクトリを作成
         os.makedirs(self.output_dir, exist_ok=True)
     
+    @property
+    def _style_cache(self) -> Dict[Any, Dict]:
+        """段落要素(w:p) -> フォントスタイル。fill_wordの間だけ、スレッドごとに保持する"""
+        cache = getattr(self._local, "style_cache", None)
+        if cache is None:
+            cache = self._local.style_cache = {}
+        return cache
+    
     def _get_existing_font_style(self, paragraph):
         """
         段落から既存のフォントスタイルを取得する。
@@ -36,6 +519,13 @@ class DocumentFiller:
         Returns:
             Dict with font_name, font_size, bold, italic
         """
+        # Paragraphプロキシはアクセスごとに作り直されるため、下層のw:p要素をキーにする
+        # （要素自体をキーに保持するのでidが他の要素に再利用されることもない）
+        key = paragraph._p
+        cached = self._style_cache.get(key)
+        if cached is not None:
+            return cached
+        
         style = {
             "font_name": None,
             "font_size": None,
@@ -44,23 +534,29 @@ class DocumentFiller:
         }
         
         try:
-            if paragraph.runs:
-                first_run = paragraph.runs[0]
-                if first_run.font:
-                    style["font_name"] = first_run.font.name
-                    style["font_size"] = first_run.font.size
-                    style["bold"] = first_run.font.bold
-                    style["italic"] = first_run.font.italic
+            # runs / font / style はアクセスのたびにプロキシを作り直すので1回ずつだけ読む
+            runs = paragraph.runs
+            if runs:
+                font = runs[0].font
+                if font:
+                    style["font_name"] = font.name
+                    style["font_size"] = font.size
+                    style["bold"] = font.bold
+                    style["italic"] = font.italic
             
             # runがない場合やフォントが取れない場合、段落スタイルから取得を試みる
-            if style["font_name"] is None and paragraph.style and paragraph.style.font:
-                style["font_name"] = paragraph.style.font.name
-                style["font_size"] = paragraph.style.font.size
-                style["bold"] = paragraph.style.font.bold
-                style["italic"] = paragraph.style.font.italic
+            if style["font_name"] is None:
+                para_style = paragraph.style
+                font = para_style.font if para_style else None
+                if font:
+                    style["font_name"] = font.name
+                    style["font_size"] = font.size
+                    style["bold"] = font.bold
+                    style["italic"] = font.italic
         except Exception as e:
-            self.logger.debug(f"[DOC_FILLER] Could not get font style: {e}")
+            self.logger.debug("[DOC_FILLER] Could not get font style: %s", e)
         
+        self._style_cache[key] = style
         return style
     
     def _add_run_with_style(self, paragraph, text: str, style: Dict = None):
@@ -85,23 +581,74 @@ class DocumentFiller:
                 if style.get("italic") is not None:
                     run.font.italic = style["italic"]
             except Exception as e:
-                self.logger.debug(f"[DOC_FILLER] Could not apply font style: {e}")
+                self.logger.debug("[DOC_FILLER] Could not apply font style: %s", e)
         
         return run
     
+    def _replace_paragraph_text(self, paragraph, original_text: str, text: str, style: Dict = None):
+        """
+        段落のテキストを置き換える。
+        
+        runが1つだけで段落のテキストがそのrunだけの場合は、そのrunのテキストを書き換える
+        （runの書式がそのまま残り、clear() + add_run() で作り直さずに済む）。
+        それ以外は段落をクリアしてスタイル付きのrunを追加する。
+        
+        Args:
+            paragraph: 対象の段落
+            original_text: 置き換え前の段落テキスト（paragraph.text）
+            text: 新しいテキスト
+            style: フォントスタイル辞書（_get_existing_font_styleの戻り値）
+        """
+        runs = paragraph.runs
+        if len(runs) == 1 and runs[0].text == original_text:
+            runs[0].text = text
+            return runs[0]
+        
+        paragraph.clear()
+        return self._add_run_with_style(paragraph, text, style)
+    
     def _clear_and_add_with_style(self, paragraph, text: str):
         """
         段落をクリアしてスタイルを保持したままテキストを追加する。
+        
+        先頭のrunがあればそのw:rだけを残してテキストを書き換える（w:rPrがそのまま残るので、
+        色・ハイライト等もフォントスタイル辞書を経由せずに保持される）。
+        runがない場合は、python-docxのclear() + add_run() + font設定の代わりに、
+        スタイル込みのw:r要素を1回のパースで作って差し込む。
         """
-        # 既存のスタイルを保存
+        p = paragraph._p
+        first_r = p.find(_QN_W_R)
+        if first_r is not None:
+            # 先頭のrunとw:pPr以外の子要素を削除
+            for child in list(p):
+                if child is not first_r and child.tag != _QN_W_PPR:
+                    p.remove(child)
+            run = Run(first_r, paragraph)
+            run.text = text
+            self._style_cache.pop(p, None)
+            return run
+        
+        # 既存のスタイル（段落スタイル）を保存
         style = self._get_existing_font_style(paragraph)
         
-        # 段落をクリア
-        paragraph.clear()
+        # 段落をクリア（w:pPr以外の子要素を削除）
+        for child in list(p):
+            if child.tag != _QN_W_PPR:
+                p.remove(child)
         
         # スタイルを適用してテキストを追加
-        return self._add_run_with_style(paragraph, text, style)
+        try:
+            rpr = _run_properties_xml(style)
+        except Exception as e:
+            self.logger.debug("[DOC_FILLER] Could not apply font style: %s", e)
+            rpr = ""
+        new_r = parse_xml(_RUN_TEMPLATE.format(rpr=rpr, content=_run_content_xml(text)))
+        p.append(new_r)
+        
+        self._style_cache.pop(p, None)
+        return Run(new_r, paragraph)
     
+    @_log_slow_call
     def fill_document(
         self, 
         file_path: str, 
@@ -125,6 +672,12 @@ class DocumentFiller:
         
         ext = os.path.splitext(file_path)[1].lower()
         
+        # ライブラリがない場合はファイルに触れる前に失敗させる
+        if ext in ['.xlsx', '.xlsm', '.xls'] and not _HAS_XL:
+            return None, "openpyxlがインストールされていません"
+        if ext in ['.docx', '.doc'] and not _HAS_DOCX:
+            return None, "python-docxがインストールされていません"
+        
         try:
             if ext in ['.xlsx', '.xlsm', '.xls']:
                 return self.fill_excel(file_path, field_values, user_id)
@@ -136,6 +689,26 @@ class DocumentFiller:
             self.logger.error(f"[DOC_FILLER] Fill failed: {e}")
             return None, f"入力エラー: {e}"
     
+    def fill_batch(
+        self,
+        jobs: List[Tuple[str, Dict[str, Any], Optional[str]]]
+    ) -> List[Tuple[Optional[str], str]]:
+        """
+        複数のテンプレートへの入力を並行して行う。
+        
+        Args:
+            jobs: (テンプレートファイルのパス, field_values, user_id) のリスト
+            
+        Returns:
+            jobsと同じ順序の (出力ファイルパス, メッセージ) のリスト
+        """
+        if not jobs:
+            return []
+        
+        max_workers = min(len(jobs), self.BATCH_MAX_WORKERS)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(lambda job: self.fill_document(*job), jobs))
+    
     def fill_excel(
         self, 
         file_path: str, 
@@ -143,7 +716,12 @@ class DocumentFiller:
         user_id: str = None
     ) -> Tuple[Optional[str], str]:
         """
-        openpyxlでExcelに入力する。
+        Excelに入力する。
+        
+        懸念点コメントがない.xlsx/.xlsmは、対象シートのXMLだけを書き換えて他のパーツを
+        そのままコピーする（ブック全体を読み込まないため、大きなテンプレートでもメモリは
+        対象シート分で済む）。コメントを付ける場合やこの経路で扱えないブックはopenpyxlで入力する。
+        openpyxlのwrite_onlyでの作り直しは書式・結合セル・入力規則が失われるため使わない。
         
         Args:
             file_path: テンプレートExcelファイルのパス
@@ -154,74 +732,108 @@ class DocumentFiller:
         Returns:
             (出力ファイルパス, メッセージ)
         """
-        try:
-            import openpyxl
-            from openpyxl.comments import Comment
-        except ImportError:
+        if not _HAS_XL:
             return None, "openpyxlがインストールされていません"
         
+        # 新形式・旧形式の判別は最初に1回だけ行う
+        specs = _normalize_field_values(field_values)
+        
+        # 値がひとつもなければブックを読み込まず、出力ファイルも作らない
+        if not specs:
+            self.logger.info("[DOC_FILLER] Filled 0 fields in Excel (no values)")
+            return None, "入力できるフィールドがありませんでした"
+        
+        output_path = None
         try:
-            # テンプレートをコピー
-            output_path = self._create_output_path(file_path, user_id, "xlsx")
-            shutil.copy2(file_path, output_path)
+            # マクロ付きブックは拡張子ごと引き継ぐ（.xlsxで保存するとVBAが失われる）
+            ext = os.path.splitext(file_path)[1].lower()
+            is_xlsm = ext == ".xlsm"
+            output_path = self._create_output_path(file_path, user_id, "xlsm" if is_xlsm else "xlsx")
+            
+            # 懸念点コメントがない.xlsx/.xlsmは、対象シートのXMLだけを書き換える高速経路で入力する
+            # （vbaProject.bin等の未変更パーツはそのままコピーされる）
+            if (
+                etree is not None
+                and ext in (".xlsx", ".xlsm")
+                and not any(spec.has_concern for spec in specs)
+            ):
+                filled_count = self._fill_excel_streaming(file_path, output_path, specs)
+                if filled_count is not None:
+                    self.logger.info(f"[DOC_FILLER] Filled {filled_count} fields in Excel (sheet XML patch)")
+                    if filled_count == 0:
+                        os.remove(output_path)
+                        return None, "入力できるフィールドがありませんでした"
+                    return output_path, f"Excelに{filled_count}項目を入力しました"
+            
+            # 書き込み対象をシートごとにまとめ、シート内は(行, 列)順に書き込む
+            # （field_idの解析はブックを読み込む前に済ませ、有効なものがなければ読み込まない）
+            sheet_entries: Dict[str, List[Tuple[int, int, _FieldSpec]]] = {}
+            for spec in specs:
+                # field_id: "シート名_行_列"
+                parsed = _parse_excel_field_id(spec.field_id)
+                if parsed is None:
+                    self.logger.warning(f"[DOC_FILLER] Invalid field_id format: {spec.field_id}")
+                    continue
+                
+                sheet_name, row, col = parsed
+                sheet_entries.setdefault(sheet_name, []).append((row, col, spec))
             
-            # ファイルを開いて編集
-            wb = openpyxl.load_workbook(output_path)
-            filled_count = 0
-            concern_count = 0
+            if not sheet_entries:
+                self.logger.info("[DOC_FILLER] Filled 0 fields in Excel, 0 comments added")
+                os.remove(output_path)
+                return None, "入力できるフィールドがありませんでした"
             
-            for field_id, field_data in field_values.items():
-                # 新形式と旧形式の両方に対応
-                if isinstance(field_data, dict):
-                    value = field_data.get("value", "")
-                    concern_type = field_data.get("concern_type", "none")
-                    concern_reason = field_data.get("concern_reason", "")
-                    field_name = field_data.get("field_name", field_id)
-                else:
-                    value = field_data
-                    concern_type = "none"
-                    concern_reason = ""
-                    field_name = field_id
+            # テンプレートを直接開いて編集し、出力先に保存する（事前コピーはしない）
+            wb = openpyxl.load_workbook(file_path, keep_vba=is_xlsm)
+            try:
+                filled_count = 0
+                concern_count = 0
                 
-                if not value:
-                    continue
+                sheet_names = set(wb.sheetnames)
+                for sheet_name in [name for name in sheet_entries if name not in sheet_names]:
+                    skipped = sheet_entries.pop(sheet_name)
+                    self.logger.warning(f"[DOC_FILLER] Sheet not found: {sheet_name} ({len(skipped)} fields skipped)")
                 
-                try:
-                    # field_id: "シート名_行_列"
-                    parts = field_id.rsplit('_', 2)
-                    if len(parts) != 3:
-                        self.logger.warning(f"[DOC_FILLER] Invalid field_id format: {field_id}")
-                        continue
-                    
-                    sheet_name, row_str, col_str = parts
-                    row = int(row_str)
-                    col = int(col_str)
-                    
-                    if sheet_name not in wb.sheetnames:
-                        self.logger.warning(f"[DOC_FILLER] Sheet not found: {sheet_name}")
-                        continue
-                    
-                    sheet = wb[sheet_name]
-                    cell = sheet.cell(row=row, column=col, value=value)
-                    filled_count += 1
-                    
-                    # 懸念点がある場合はコメントを追加
-                    if concern_type != "none" and concern_reason:
-                        comment_text = self._get_concern_comment_text(concern_type, concern_reason, field_name)
-                        cell.comment = Comment(comment_text, "Shadow Director AI")
-                        concern_count += 1
-                        self.logger.debug(f"[DOC_FILLER] Added comment to {field_id}: {concern_type}")
+                # コメントはセルへの書き込みが終わってからまとめて付ける
+                pending_comments: List[Tuple[Any, str]] = []
+                
+                get_comment_text = self._get_concern_comment_text
+                log_debug = self.logger.debug
+                for sheet_name, entries in sheet_entries.items():
+                    # シートの取得とメソッド参照の解決はシートごとに1回
+                    sheet_cell = wb[sheet_name].cell
+                    # 同じセルへの重複指定は後勝ちのまま（安定ソート）
+                    entries.sort(key=itemgetter(0, 1))
                     
-                except (ValueError, IndexError) as e:
-                    self.logger.warning(f"[DOC_FILLER] Error filling field {field_id}: {e}")
-            
-            wb.save(output_path)
-            wb.close()
-            
-            self.logger.info(f"[DOC_FILLER] Filled {filled_count} fields in Excel, {concern_count} comments added")
-            
-            if filled_count == 0:
-                return None, "入力できるフィールドがありませんでした"
+                    for row, col, spec in entries:
+                        try:
+                            cell = sheet_cell(row=row, column=col, value=spec.value)
+                            filled_count += 1
+                            
+                            # 懸念点がある場合はコメントを追加
+                            if spec.has_concern:
+                                comment_text = get_comment_text(spec.concern_type, spec.concern_reason, spec.field_name)
+                                pending_comments.append((cell, comment_text))
+                                concern_count += 1
+                                log_debug("[DOC_FILLER] Added comment to %s: %s", spec.field_id, spec.concern_type)
+                            
+                        except (ValueError, IndexError) as e:
+                            self.logger.warning(f"[DOC_FILLER] Error filling field {spec.field_id}: {e}")
+                
+                for cell, comment_text in pending_comments:
+                    cell.comment = Comment(comment_text, _COMMENT_AUTHOR)
+                
+                self.logger.info(f"[DOC_FILLER] Filled {filled_count} fields in Excel, {concern_count} comments added")
+                
+                # 入力がなければ保存せず、確保した出力ファイルも残さない
+                if filled_count == 0:
+                    os.remove(output_path)
+                    return None, "入力できるフィールドがありませんでした"
+                
+                with self._atomic_output(output_path) as temp_path:
+                    wb.save(temp_path)
+            finally:
+                wb.close()
             
             message = f"Excelに{filled_count}項目を入力しました"
             if concern_count > 0:
@@ -231,8 +843,215 @@ class DocumentFiller:
             
         except Exception as e:
             self.logger.error(f"[DOC_FILLER] Excel fill error: {e}")
+            self._discard_output(output_path)
             return None, f"Excel入力エラー: {e}"
     
+    def _fill_excel_streaming(
+        self,
+        file_path: str,
+        output_path: str,
+        specs: List[_FieldSpec]
+    ) -> Optional[int]:
+        """
+        openpyxlでブック全体を読み込まず、対象シートのXMLだけを書き換えてExcelに入力する。
+        
+        共有文字列表（sharedStrings.xml）に触れないよう、文字列はinlineStrとして書き込む。
+        値の型の扱い（"="で始まる文字列は数式、エラー値、真偽値）はopenpyxlと同じにする。
+        未変更のパーツはZIPからそのままコピーする。
+        
+        Args:
+            file_path: テンプレートExcelファイルのパス
+            output_path: 出力先パス
+            specs: 入力するフィールド（_normalize_field_values の結果）
+            
+        Returns:
+            入力件数。この経路で安全に扱えないブック・値（数式セルへの上書き、
+            r属性のない行/セル、文字列・数値・真偽値以外の値等）の場合はNone（openpyxlにフォールバック）
+        """
+        try:
+            with zipfile.ZipFile(file_path, "r") as zin:
+                workbook_root = etree.fromstring(zin.read("xl/workbook.xml"))
+                rels_root = etree.fromstring(zin.read("xl/_rels/workbook.xml.rels"))
+                
+                # シート名 -> ワークシートパーツ名
+                rel_targets = {rel.get("Id"): rel.get("Target") for rel in rels_root}
+                sheet_parts = {}
+                for sheet in workbook_root.iter(_QN_XL_SHEET):
+                    target = rel_targets.get(sheet.get(_QN_XL_R_ID))
+                    if not target:
+                        continue
+                    if target.startswith("/"):
+                        part = target.lstrip("/")
+                    else:
+                        part = posixpath.normpath(posixpath.join("xl", target))
+                    sheet_parts[sheet.get("name")] = part
+                
+                # シートごとに書き込み対象を集める
+                targets: Dict[str, List[Tuple[int, int, Any]]] = {}
+                filled_count = 0
+                for spec in specs:
+                    # field_id: "シート名_行_列"
+                    parsed = _parse_excel_field_id(spec.field_id)
+                    if parsed is None:
+                        self.logger.warning(f"[DOC_FILLER] Invalid field_id format: {spec.field_id}")
+                        continue
+                    
+                    sheet_name, row, col = parsed
+                    part = sheet_parts.get(sheet_name)
+                    if part is None:
+                        self.logger.warning(f"[DOC_FILLER] Sheet not found: {sheet_name}")
+                        continue
+                    
+                    targets.setdefault(part, []).append((row, col, spec.value))
+                    filled_count += 1
+                
+                if filled_count == 0:
+                    return 0
+                
+                patched: Dict[str, bytes] = {}
+                for part, cells in targets.items():
+                    # 行・セルの挿入位置探索が前から順に進むよう(行, 列)順に並べる
+                    cells.sort(key=itemgetter(0, 1))
+                    sheet_xml = self._patch_sheet_xml(zin.read(part), cells)
+                    if sheet_xml is None:
+                        self.logger.info(f"[DOC_FILLER] Sheet XML patch not applicable to {part}, using openpyxl")
+                        return None
+                    patched[part] = sheet_xml
+                
+                # 入力した値に依存する数式を開いた時に再計算させる
+                patched["xl/workbook.xml"] = self._request_full_calc(workbook_root)
+                
+                with self._atomic_output(output_path) as temp_path, \
+                        open(temp_path, "wb", buffering=self.ZIP_COPY_BUFFER_SIZE) as fout, \
+                        zipfile.ZipFile(fout, "w", zipfile.ZIP_DEFLATED) as zout:
+                    for item in zin.infolist():
+                        data = patched.get(item.filename)
+                        if data is None:
+                            # 未変更のパーツ（他のシート・スタイル・画像等）はストリームでコピーする
+                            self._copy_zip_entry(zin, zout, item)
+                        else:
+                            zout.writestr(item, data)
+            
+            return filled_count
+            
+        except (KeyError, zipfile.BadZipFile, etree.XMLSyntaxError) as e:
+            self.logger.info(f"[DOC_FILLER] Sheet XML patch unavailable ({e}), using openpyxl")
+            return None
+    
+    def _patch_sheet_xml(self, sheet_xml: bytes, cells: List[Tuple[int, int, Any]]) -> Optional[bytes]:
+        """
+        ワークシートXMLの指定セルに値を書き込む。
+        
+        Args:
+            sheet_xml: xl/worksheets/sheetN.xml の内容
+            cells: (行, 列, 値) のリスト
+            
+        Returns:
+            書き換え後のXML。この方式で扱えない場合はNone
+        """
+        root = etree.fromstring(sheet_xml, etree.XMLParser(huge_tree=True))
+        sheet_data = root.find(_QN_XL_SHEET_DATA)
+        if sheet_data is None:
+            return None
+        
+        rows = {}
+        for row_el in sheet_data.iterchildren(_QN_XL_ROW):
+            r = row_el.get("r")
+            if r is None or not r.isdigit():
+                return None
+            rows[int(r)] = row_el
+        row_numbers = sorted(rows)
+        
+        # cellsは(行, 列)順なので、同じ行の続きは直前に書いたセルから探す
+        last_row = None
+        last_cell = None
+        for row, col, value in cells:
+            row_el = rows.get(row)
+            if row_el is None:
+                # 行番号順になるよう新しい行を挿入
+                row_el = etree.Element(_QNAME_XL_ROW, r=str(row))
+                pos = bisect.bisect(row_numbers, row)
+                if pos < len(row_numbers):
+                    rows[row_numbers[pos]].addprevious(row_el)
+                else:
+                    sheet_data.append(row_el)
+                row_numbers.insert(pos, row)
+                rows[row] = row_el
+            
+            # 列順を保ったまま対象セルを探す/作る
+            if row == last_row:
+                candidates = itertools.chain((last_cell,), last_cell.itersiblings(_QN_XL_C))
+            else:
+                candidates = row_el.iterchildren(_QN_XL_C)
+            cell = None
+            for c in candidates:
+                ref = c.get("r")
+                if ref is None:
+                    return None
+                c_col = _column_index(ref)
+                if c_col == col:
+                    cell = c
+                    break
+                if c_col > col:
+                    cell = etree.Element(_QNAME_XL_C, r=f"{_column_letter(col)}{row}")
+                    c.addprevious(cell)
+                    break
+            if cell is None:
+                cell = etree.SubElement(row_el, _QNAME_XL_C, r=f"{_column_letter(col)}{row}")
+                # spansは省略可能なヒントなので、範囲外に書く場合に備えて外す
+                row_el.attrib.pop("spans", None)
+            
+            if cell.find(_QN_XL_F) is not None:
+                # 数式セルの上書きはcalcChainとの整合が必要なためopenpyxlに任せる
+                return None
+            last_row = row
+            last_cell = cell
+            
+            for child in cell.findall(_QN_XL_V) + cell.findall(_QN_XL_IS):
+                cell.remove(child)
+            
+            # openpyxlのCellと同じ規則で型を決める（コメントの有無で出力が変わらないように）
+            if isinstance(value, bool):
+                cell.set("t", "b")
+                etree.SubElement(cell, _QNAME_XL_V).text = "1" if value else "0"
+            elif isinstance(value, (int, float)):
+                cell.attrib.pop("t", None)
+                etree.SubElement(cell, _QNAME_XL_V).text = str(value)
+            elif isinstance(value, str):
+                value = value[:_XL_MAX_STRING_LENGTH]
+                if len(value) > 1 and value.startswith("="):
+                    cell.attrib.pop("t", None)
+                    etree.SubElement(cell, _QNAME_XL_F).text = value[1:]
+                elif value in _XL_ERROR_CODES:
+                    cell.set("t", "e")
+                    etree.SubElement(cell, _QNAME_XL_V).text = value
+                else:
+                    cell.set("t", "inlineStr")
+                    text = etree.SubElement(etree.SubElement(cell, _QNAME_XL_IS), _QNAME_XL_T)
+                    text.set(_XML_SPACE, "preserve")
+                    text.text = value
+            else:
+                # 日付等の変換はopenpyxlに任せる
+                return None
+        
+        return etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+    
+    def _request_full_calc(self, workbook_root) -> bytes:
+        """workbook.xmlのcalcPrにfullCalcOnLoadを立てて返す"""
+        calc_pr = workbook_root.find(_QN_XL_CALC_PR)
+        if calc_pr is None:
+            calc_pr = etree.Element(_QNAME_XL_CALC_PR)
+            anchor = None
+            for child in workbook_root:
+                if child.tag in _XL_CALC_PR_PRECEDING:
+                    anchor = child
+            if anchor is not None:
+                anchor.addnext(calc_pr)
+            else:
+                workbook_root.append(calc_pr)
+        calc_pr.set("fullCalcOnLoad", "1")
+        return etree.tostring(workbook_root, xml_declaration=True, encoding="UTF-8", standalone=True)
+    
     def fill_word(
         self, 
         file_path: str, 
@@ -252,112 +1071,123 @@ class DocumentFiller:
         Returns:
             (出力ファイルパス, メッセージ)
         """
-        try:
-            from docx import Document
-            from docx.shared import Pt, RGBColor
-        except ImportError:
+        if not _HAS_DOCX:
             return None, "python-docxがインストールされていません"
         
+        # 新形式・旧形式の判別は最初に1回だけ行う
+        specs = _normalize_field_values(field_values)
+        
+        # 値がひとつもなければテンプレートを読み込まず、出力ファイルも作らない
+        if not specs:
+            self.logger.info("[DOC_FILLER] Filled 0 fields in Word (no values)")
+            return None, "入力できるフィールドがありませんでした"
+        
+        output_path = None
         try:
-            # テンプレートをコピー
             output_path = self._create_output_path(file_path, user_id, "docx")
-            shutil.copy2(file_path, output_path)
             
-            # ファイルを開いて編集
-            doc = Document(output_path)
+            # 本文パーツだけを読み込む高速経路（使えない場合はpython-docxで全体を読み込む）
+            doc = self._load_word_document_xml(file_path) if self.use_lxml_fast_path else None
+            if doc is None:
+                # テンプレートを直接開いて編集し、出力先に保存する（事前コピーはしない）
+                doc = Document(file_path)
+                
+                # コメント用のパーツを初期化
+                self._init_comments_part(doc)
+            
             filled_count = 0
             concern_count = 0
+            self._style_cache.clear()
+            # この入力で付けるコメントはすべて同じ日時にする
+            comment_date = _comment_timestamp()
             
-            # コメント用のパーツを初期化
-            self._init_comments_part(doc)
+            # doc.tables / doc.paragraphs / table.rows はアクセスごとに本文を走査するため一度だけ取得する
+            table_rows, paragraphs = self._prepare_doc_index(doc, [spec.field_id for spec in specs])
+            # row.cells はアクセスごとにセルオブジェクトを作り直すため、(テーブル番号, 行)ごとに1回だけ取得する
+            row_cells = {}
             
             # 懸念点があるフィールドの情報を蓄積（コメント追加用）
             concerns_to_add = []
             
-            for field_id, field_data in field_values.items():
-                # 新形式と旧形式の両方に対応
-                if isinstance(field_data, dict):
-                    value = field_data.get("value", "")
-                    input_pattern = field_data.get("input_pattern", "inline")
-                    location = field_data.get("location", {})
-                    input_length_type = field_data.get("input_length_type", "unknown")
-                    concern_type = field_data.get("concern_type", "none")
-                    concern_reason = field_data.get("concern_reason", "")
-                    field_name = field_data.get("field_name", field_id)
-                else:
-                    # 旧形式（文字列のみ）
-                    value = field_data
-                    input_pattern = "inline"
-                    location = {}
-                    input_length_type = "unknown"
-                    concern_type = "none"
-                    concern_reason = ""
-                    field_name = field_id
-                
-                if not value:
-                    continue
-                
-                # 懸念点がある場合は後でコメントを追加
-                has_concern = concern_type != "none" and concern_reason
-                
+            # フィールドは順に入力する。1つのlxmlツリーは複数スレッドから変更できず、
+            # スタイルキャッシュもスレッドごとのため、並列化はfill_batchで文書単位に行う
+            # ループ内で使うメソッド参照は1回だけ解決する
+            fill_table_cell = self._fill_word_table_cell_with_para
+            fill_paragraph = self._fill_word_paragraph_with_pattern_and_para
+            log_debug = self.logger.debug
+            
+            for spec in specs:
+                field_id = spec.field_id
                 try:
                     filled = False
                     target_paragraph = None
                     
                     if field_id.startswith("table"):
                         # テーブルセル: "tableN_行_列" - input_length_typeを考慮
-                        filled, target_paragraph = self._fill_word_table_cell_with_para(doc, field_id, value, input_length_type)
+                        filled, target_paragraph = fill_table_cell(
+                            table_rows, field_id, spec.value, spec.input_length_type, row_cells
+                        )
                     elif field_id.startswith("para_"):
                         # 段落: "para_N" - 入力パターン情報を使用
-                        filled, target_paragraph = self._fill_word_paragraph_with_pattern_and_para(doc, field_id, value, input_pattern, location)
+                        filled, target_paragraph = fill_paragraph(
+                            paragraphs, field_id, spec.value, spec.input_pattern, spec.location
+                        )
                     else:
                         self.logger.warning(f"[DOC_FILLER] Unknown field_id format: {field_id}")
                     
                     if filled:
                         filled_count += 1
-                        self.logger.debug(f"[DOC_FILLER] Filled {field_id} with pattern '{input_pattern}'")
+                        log_debug("[DOC_FILLER] Filled %s with pattern '%s'", field_id, spec.input_pattern)
                         
                         # 懸念点がある場合、コメント追加対象としてリストに追加
-                        if has_concern and target_paragraph is not None:
+                        if spec.has_concern and target_paragraph is not None:
                             concern_count += 1
                             concerns_to_add.append({
                                 "paragraph": target_paragraph,
-                                "field_name": field_name,
-                                "concern_type": concern_type,
-                                "concern_reason": concern_reason
+                                "field_name": spec.field_name,
+                                "concern_type": spec.concern_type,
+                                "concern_reason": spec.concern_reason
                             })
                         
                 except Exception as e:
                     self.logger.warning(f"[DOC_FILLER] Error filling field {field_id}: {e}")
             
-            # 懸念点コメントを追加
-            for idx, concern in enumerate(concerns_to_add):
-                try:
-                    comment_text = self._get_concern_comment_text(
-                        concern["concern_type"], 
-                        concern["concern_reason"], 
-                        concern["field_name"]
-                    )
-                    self._add_word_native_comment(
-                        doc, 
-                        concern["paragraph"], 
-                        comment_text, 
-                        idx
-                    )
-                except Exception as e:
-                    self.logger.warning(f"[DOC_FILLER] Failed to add comment: {e}")
+            # 段落要素への参照を手放す
+            self._style_cache.clear()
             
-            doc.save(output_path)
+            # 入力がなければ保存せず、確保した出力ファイルも残さない
+            if filled_count == 0:
+                self.logger.info("[DOC_FILLER] Filled 0 fields in Word")
+                os.remove(output_path)
+                return None, "入力できるフィールドがありませんでした"
             
-            # コメントをZIPファイルに注入（python-docxの制限を回避）
-            if concerns_to_add and hasattr(doc, '_comments_element'):
-                self._inject_comments_to_docx(output_path, doc._comments_element)
+            # 懸念点コメントを追加（懸念点がなければcomments要素は作らない）
+            comments_added = 0
+            if concerns_to_add:
+                comments_added = self._add_word_native_comments(doc, concerns_to_add, comment_date)
+            
+            # python-docxはcomments.xmlを保存しないため、保存と同じZIP書き込みで注入する
+            # （既存のコメントパーツに追加した場合は_comments_elementがなく、python-docxが保存する）
+            comments_element = getattr(doc, '_comments_element', None) if comments_added else None
+            has_comments = comments_element is not None
+            
+            if isinstance(doc, _WordDocumentXml):
+                document_xml = etree.tostring(doc.element, xml_declaration=True, encoding="UTF-8", standalone=True)
+                self._write_docx(
+                    file_path, output_path,
+                    {self.WORD_DOCUMENT_PART: document_xml},
+                    comments_element if has_comments else None
+                )
+            elif has_comments:
+                buffer = io.BytesIO()
+                doc.save(buffer)
+                self._write_docx(buffer, output_path, comments_element=comments_element)
+            else:
+                with self._atomic_output(output_path) as temp_path:
+                    doc.save(temp_path)
             
             self.logger.info(f"[DOC_FILLER] Filled {filled_count} fields in Word, {concern_count} comments added")
             
-            if filled_count == 0:
-                return None, "入力できるフィールドがありませんでした"
-            
             message = f"Wordに{filled_count}項目を入力しました"
             if concern_count > 0:
                 message += f"（{concern_count}件のコメント付き）"
@@ -366,41 +1196,166 @@ class DocumentFiller:
             
         except Exception as e:
             self.logger.error(f"[DOC_FILLER] Word fill error: {e}")
+            self._discard_output(output_path)
             return None, f"Word入力エラー: {e}"
 
     
-    def _fill_word_table_cell(self, doc, field_id: str, value: str, input_length_type: str = "unknown") -> bool:
+    def _load_word_document_xml(self, file_path: str) -> Optional[_WordDocumentXml]:
+        """
+        テンプレートからword/document.xmlだけを読み込む。
+        
+        既存のコメントパーツを持つテンプレートなど、本文パーツだけでは
+        扱えない場合はNoneを返す（python-docxにフォールバック）。
+        """
+        try:
+            with zipfile.ZipFile(file_path, "r") as zin:
+                names = set(zin.namelist())
+                if self.WORD_DOCUMENT_PART not in names or "word/comments.xml" in names:
+                    return None
+                element = parse_xml(zin.read(self.WORD_DOCUMENT_PART))
+            
+            if getattr(element, "body", None) is None:
+                return None
+            return _WordDocumentXml(element)
+            
+        except Exception as e:
+            self.logger.info(f"[DOC_FILLER] document.xml fast path unavailable ({e}), using python-docx")
+            return None
+    
+    def _write_docx(
+        self,
+        source,
+        output_path: str,
+        parts: Optional[Dict[str, bytes]] = None,
+        comments_element=None
+    ):
+        """
+        docxパッケージをZIPの書き込み1回でoutput_pathに書き出す。
+        
+        Args:
+            source: 元のdocx（パスまたはファイルオブジェクト）
+            output_path: 出力先パス
+            parts: 差し替えるパーツ {ZIP内パス: 内容}
+            comments_element: 追加するコメント要素（w:comments）。あればcomments.xmlと
+                その参照（document.xml.rels / [Content_Types].xml）も同じ書き込みで追加する
+        """
+        parts = parts or {}
+        
+        comments_xml = None
+        if comments_element is not None and len(comments_element) > 0:
+            try:
+                # 正しいOOXML形式のcomments.xmlを手動で構築
+                comments_xml = self._build_comments_xml(comments_element)
+            except Exception as e:
+                self.logger.warning(f"[DOC_FILLER] Failed to inject comments: {e}")
+        
+        # comments.xmlを追加する場合に書き換えるパーツ
+        patchers = {}
+        if comments_xml is not None:
+            patchers = {
+                # リレーションシップファイルにコメント参照を追加
+                'word/_rels/document.xml.rels': self._add_comments_relationship,
+                # Content_Typesにコメントタイプを追加
+                '[Content_Types].xml': self._add_comments_content_type,
+            }
+        
+        # 一時ファイルに書き出してから置き換える（sourceとoutput_pathが同じファイルでもよい）
+        with self._atomic_output(output_path) as temp_path, zipfile.ZipFile(source, 'r') as zin:
+            # ZIPのヘッダーや小さなパーツの書き込みが細かいシステムコールにならないよう大きめのバッファで開く
+            with open(temp_path, 'wb', buffering=self.ZIP_COPY_BUFFER_SIZE) as fout, zipfile.ZipFile(
+                fout, 'w', zipfile.ZIP_DEFLATED, compresslevel=self.ZIP_COMPRESS_LEVEL
+            ) as zout:
+                for item in zin.infolist():
+                    data = parts.get(item.filename)
+                    patch = patchers.get(item.filename)
+                    
+                    if data is None and patch is None:
+                        # 変更しないパーツ（画像・フォント等）はメモリに載せずにストリームでコピーする
+                        self._copy_zip_entry(zin, zout, item)
+                        continue
+                    
+                    if data is None:
+                        data = zin.read(item.filename)
+                    if patch is not None:
+                        data = patch(data)
+                    
+                    zout.writestr(item, data, compresslevel=self.ZIP_COMPRESS_LEVEL)
+                
+                if comments_xml is not None:
+                    zout.writestr('word/comments.xml', comments_xml)
+                    self.logger.info(f"[DOC_FILLER] Injected {len(comments_element)} comments to docx")
+    
+    @contextmanager
+    def _atomic_output(self, output_path: str):
+        """
+        output_pathと同じディレクトリの一時ファイルのパスを渡し、ブロックが正常に終わったら
+        その一時ファイルでoutput_pathを置き換える。
+        
+        書き込み途中で失敗しても出力先に壊れたファイルが残らず、一時ファイルは削除される。
+        一意な名前で作るため、同じファイルへの並行書き込みでも衝突しない。
+        """
+        temp_file = tempfile.NamedTemporaryFile(
+            dir=os.path.dirname(output_path) or ".",
+            suffix=os.path.splitext(output_path)[1] + ".tmp",
+            delete=False,
+        )
+        temp_path = temp_file.name
+        temp_file.close()
+        try:
+            yield temp_path
+            # 一時ファイルは0600で作られるため、確保済みの出力ファイルの権限に揃える
+            try:
+                shutil.copymode(output_path, temp_path)
+            except FileNotFoundError:
+                pass
+            os.replace(temp_path, output_path)
+        finally:
+            # 置き換えに至らなかった場合は一時ファイルを削除
+            try:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+            except OSError:
+                pass
+    
+    def _copy_zip_entry(self, zin: zipfile.ZipFile, zout: zipfile.ZipFile, item: zipfile.ZipInfo):
+        """
+        ZIPのエントリを内容を変えずに別のZIPへコピーする。
+        
+        全体をメモリに読み込まず、ZIP_COPY_BUFFER_SIZEずつ展開・圧縮しながら書き出す。
+        圧縮方式（ZIP_STORED / ZIP_DEFLATED）や日時は元のエントリのまま。
+        """
+        with zin.open(item) as src, zout.open(item, 'w') as dst:
+            shutil.copyfileobj(src, dst, self.ZIP_COPY_BUFFER_SIZE)
+    
+    def _fill_word_table_cell(self, table_rows: List[List[Any]], field_id: str, value: str, input_length_type: str = "unknown") -> bool:
         """
         Wordテーブルセルに入力。
         
         Args:
-            doc: Wordドキュメント
+            table_rows: テーブルごとの行リスト（_prepare_doc_index の結果）
             field_id: フィールドID（"tableN_行_列"形式）
             value: 入力値
             input_length_type: "short"（短文）, "long"（長文）, "unknown"
         """
         try:
             # "tableN_行_列" をパース
-            parts = field_id.split('_')
-            if len(parts) != 3:
+            parsed = _parse_table_field_id(field_id)
+            if parsed is None:
                 return False
             
-            table_part = parts[0]  # "tableN"
-            row = int(parts[1])
-            col = int(parts[2])
-            table_idx = int(table_part.replace("table", ""))
+            table_idx, row, col = parsed
             
-            if table_idx >= len(doc.tables):
+            if table_idx >= len(table_rows):
                 self.logger.warning(f"[DOC_FILLER] Table {table_idx} not found")
                 return False
             
-            table = doc.tables[table_idx]
+            rows = table_rows[table_idx]
             
-            if row >= len(table.rows):
+            if row >= len(rows):
                 self.logger.warning(f"[DOC_FILLER] Row {row} not found in table {table_idx}")
                 return False
             
-            cells = table.rows[row].cells
+            cells = rows[row].cells
             if col >= len(cells):
                 self.logger.warning(f"[DOC_FILLER] Col {col} not found in table {table_idx}, row {row}")
                 return False
@@ -412,7 +1367,7 @@ class DocumentFiller:
             if input_length_type == "short" and len(value) > 50:
                 # 短文フィールドに長いテキストが来た場合、切り詰める
                 value = value[:47] + "..."
-                self.logger.debug(f"[DOC_FILLER] Trimmed long value for short field: {field_id}")
+                self.logger.debug("[DOC_FILLER] Trimmed long value for short field: %s", field_id)
             
             # 既存テキストをクリアして新しいテキストを設定
             # フォントスタイルを保持する
@@ -428,10 +1383,15 @@ class DocumentFiller:
             self.logger.warning(f"[DOC_FILLER] Table cell fill error: {e}")
             return False
     
-    def _fill_word_paragraph(self, doc, field_id: str, value: str) -> bool:
+    def _fill_word_paragraph(self, paragraphs: List[Any], field_id: str, value: str) -> bool:
         """
         Word段落に入力（プレースホルダーを置換）。
         
+        Args:
+            paragraphs: 本文の段落リスト（doc.paragraphs）
+            field_id: フィールドID（"para_N"形式）
+            value: 入力値
+        
         対応する入力タイプ:
         - inline: コロン後に入力を追加
         - next_line: 段落全体を入力値で置換
@@ -440,58 +1400,50 @@ class DocumentFiller:
         """
         try:
             # "para_N" をパース
-            para_idx = int(field_id.replace("para_", ""))
+            para_idx = _parse_para_field_id(field_id)
             
-            if para_idx >= len(doc.paragraphs):
+            if para_idx >= len(paragraphs):
                 self.logger.warning(f"[DOC_FILLER] Paragraph {para_idx} not found")
                 return False
             
-            para = doc.paragraphs[para_idx]
+            para = paragraphs[para_idx]
             original_text = para.text
             
-            import re
-            
-            # パターン1: 下線プレースホルダー「____」「＿＿＿」を置換
-            new_text = re.sub(r'[_＿]{3,}', value, original_text)
-            if new_text != original_text:
-                para.clear()
-                para.add_run(new_text)
-                return True
-            
-            # パターン2: 空括弧プレースホルダー「（　）」を置換
-            new_text = re.sub(r'[(（]\s*[　\s]*[)）]', f'（{value}）', original_text)
-            if new_text != original_text:
-                para.clear()
-                para.add_run(new_text)
-                return True
-            
-            # パターン3: 括弧付きヒント「（入力してください）」を置換
-            new_text = re.sub(r'[(（][^)）]+[)）]', f'（{value}）', original_text)
-            if new_text != original_text:
-                para.clear()
-                para.add_run(new_text)
-                return True
-            
-            # パターン4: コロン終端の場合、コロン後に入力を追加
-            colon_match = re.match(r'^(.+?[:：])\s*$', original_text)
-            if colon_match:
-                new_text = f"{colon_match.group(1)} {value}"
-                para.clear()
-                para.add_run(new_text)
-                return True
-            
-            # パターン5: コロンがある場合、コロン後を置換
-            colon_replace_match = re.match(r'^(.+?[:：])\s*(.*)$', original_text)
-            if colon_replace_match:
-                prefix = colon_replace_match.group(1)
-                current_value = colon_replace_match.group(2).strip()
+            # 下線・括弧・コロンのいずれも含まない段落はパターン1〜5を走査しない
+            folded = original_text.translate(_ZEN2HAN)
+            if _PARAGRAPH_MARKER_RE.search(folded):
+                # パターン1: 下線プレースホルダー「____」「＿＿＿」を置換
+                # パターン2: 空括弧プレースホルダー「（　）」を置換
+                # パターン3: 括弧付きヒント「（入力してください）」を置換
+                # （優先順位はこの順。パターン2と3は _subn_brackets の1回の走査で判定する）
+                new_text, count = _subn_folded(_UNDERLINE_RE, value, original_text, folded)
+                if not count:
+                    new_text, count = _subn_brackets(f'（{value}）', original_text, folded)
+                if count:
+                    para.clear()
+                    para.add_run(new_text)
+                    return True
                 
-                # 現在の値が空、空白のみ、またはヒント（括弧付き）の場合に置換
-                if not current_value or re.match(r'^[　\s]+$', current_value) or re.match(r'^[（(].+[)）]$', current_value):
-                    new_text = f"{prefix} {value}"
+                # パターン4: コロン終端の場合、コロン後に入力を追加
+                colon_match = _COLON_END_RE.match(original_text)
+                if colon_match:
+                    new_text = f"{colon_match.group(1)} {value}"
                     para.clear()
                     para.add_run(new_text)
                     return True
+                
+                # パターン5: コロンがある場合、コロン後を置換
+                colon_replace_match = _COLON_SPLIT_RE.match(original_text)
+                if colon_replace_match:
+                    prefix = colon_replace_match.group(1)
+                    current_value = colon_replace_match.group(2).strip()
+                    
+                    # 現在の値が空（空白のみを含む）、またはヒント（括弧付き）の場合に置換
+                    if not current_value or _BRACKET_ONLY_RE.match(current_value):
+                        new_text = f"{prefix} {value}"
+                        para.clear()
+                        para.add_run(new_text)
+                        return True
             
             # パターン6: 次行入力の場合（段落が比較的空の場合）、テキスト全体を置換
             if len(original_text.strip()) < 10:
@@ -509,7 +1461,7 @@ class DocumentFiller:
     
     def _fill_word_paragraph_with_pattern(
         self, 
-        doc, 
+        paragraphs: List[Any], 
         field_id: str, 
         value: str, 
         input_pattern: str,
@@ -519,7 +1471,7 @@ class DocumentFiller:
         VLMで検出された入力パターンに基づいてWord段落に入力する。
         
         Args:
-            doc: Wordドキュメント
+            paragraphs: 本文の段落リスト（doc.paragraphs）
             field_id: フィールドID（"para_N"形式）
             value: 入力値
             input_pattern: 入力パターン（"inline", "next_line", "underline", "bracket"）
@@ -529,19 +1481,17 @@ class DocumentFiller:
             入力成功かどうか
         """
         try:
-            import re
-            
             # パターンに応じた処理
             para_idx = location.get("paragraph_idx")
             if para_idx is None:
                 # field_idからパース
-                para_idx = int(field_id.replace("para_", ""))
+                para_idx = _parse_para_field_id(field_id)
             
-            if para_idx >= len(doc.paragraphs):
+            if para_idx >= len(paragraphs):
                 self.logger.warning(f"[DOC_FILLER] Paragraph {para_idx} not found")
                 return False
             
-            para = doc.paragraphs[para_idx]
+            para = paragraphs[para_idx]
             original_text = para.text
             
             # パターン別の入力処理
@@ -553,35 +1503,35 @@ class DocumentFiller:
                 # この段落がラベルの次の段落なので、内容を完全に置き換える
                 para.clear()
                 self._add_run_with_style(para, value, style)
-                self.logger.debug(f"[DOC_FILLER] Applied next_line pattern to para {para_idx}")
+                self.logger.debug("[DOC_FILLER] Applied next_line pattern to para %s", para_idx)
                 return True
             
             elif input_pattern == "underline":
                 # 下線プレースホルダー「____」を置換（スタイル保持）
-                new_text = re.sub(r'[_＿]{2,}', value, original_text)
+                # 下線文字を含まない段落は正規表現を走らせない
+                new_text = original_text
+                if '_' in original_text or '＿' in original_text:
+                    new_text, _ = _subn_folded(_UNDERLINE_SHORT_RE, value, original_text)
                 if new_text != original_text:
                     para.clear()
                     self._add_run_with_style(para, new_text, style)
-                    self.logger.debug(f"[DOC_FILLER] Applied underline pattern to para {para_idx}")
+                    self.logger.debug("[DOC_FILLER] Applied underline pattern to para %s", para_idx)
                     return True
                 # 下線がない場合はinlineとして処理
                 input_pattern = "inline"
             
             elif input_pattern == "bracket":
                 # 括弧プレースホルダー「（　）」「（入力してください）」を置換（スタイル保持）
-                # まず空括弧を試す
-                new_text = re.sub(r'[(（]\s*[　\s]*[)）]', f'（{value}）', original_text)
+                # 開き括弧を含まない段落は正規表現を走らせない
+                # 空括弧を優先し、なければヒント付き括弧を置換する
+                folded = original_text.translate(_ZEN2HAN)
+                new_text = original_text
+                if '(' in folded:
+                    new_text, _ = _subn_brackets(f'（{value}）', original_text, folded)
                 if new_text != original_text:
                     para.clear()
                     self._add_run_with_style(para, new_text, style)
-                    self.logger.debug(f"[DOC_FILLER] Applied bracket pattern (empty) to para {para_idx}")
-                    return True
-                # ヒント付き括弧を試す
-                new_text = re.sub(r'[(（][^)）]+[)）]', f'（{value}）', original_text)
-                if new_text != original_text:
-                    para.clear()
-                    self._add_run_with_style(para, new_text, style)
-                    self.logger.debug(f"[DOC_FILLER] Applied bracket pattern (with hint) to para {para_idx}")
+                    self.logger.debug("[DOC_FILLER] Applied bracket pattern to para %s", para_idx)
                     return True
                 # 括弧がない場合はinlineとして処理
                 input_pattern = "inline"
@@ -589,77 +1539,131 @@ class DocumentFiller:
             # inlineパターン（デフォルト）
             if input_pattern == "inline":
                 # コロン後に入力を追加/置換（スタイル保持）
-                colon_match = re.match(r'^(.+?[:：])\s*(.*)$', original_text)
+                colon_match = _COLON_SPLIT_RE.match(original_text)
                 if colon_match:
                     prefix = colon_match.group(1)
                     current_value = colon_match.group(2).strip()
                     
-                    # 現在の値が空、空白のみ、下線、またはヒント（括弧付き）の場合に置換
+                    # 現在の値が空（空白のみを含む）、下線、またはヒント（括弧付き）の場合に置換
                     if (not current_value or 
-                        re.match(r'^[　\s]+$', current_value) or 
-                        re.match(r'^[_＿]+$', current_value) or
-                        re.match(r'^[（(].+[)）]$', current_value)):
+                        not current_value.strip('_＿') or
+                        _BRACKET_ONLY_RE.match(current_value)):
                         new_text = f"{prefix} {value}"
                         para.clear()
                         self._add_run_with_style(para, new_text, style)
-                        self.logger.debug(f"[DOC_FILLER] Applied inline pattern to para {para_idx}")
+                        self.logger.debug("[DOC_FILLER] Applied inline pattern to para %s", para_idx)
                         return True
                     else:
                         # 既存の値がある場合は置き換える
                         new_text = f"{prefix} {value}"
                         para.clear()
                         self._add_run_with_style(para, new_text, style)
-                        self.logger.debug(f"[DOC_FILLER] Replaced existing value with inline pattern in para {para_idx}")
+                        self.logger.debug("[DOC_FILLER] Replaced existing value with inline pattern in para %s", para_idx)
                         return True
                 
                 # コロンがない場合は段落末尾に追加（スタイル保持）
                 self._add_run_with_style(para, f" {value}", style)
-                self.logger.debug(f"[DOC_FILLER] Appended value to para {para_idx} (no colon found)")
+                self.logger.debug("[DOC_FILLER] Appended value to para %s (no colon found)", para_idx)
                 return True
             
             # 不明なパターンの場合はフォールバックとして既存メソッドを使用
             self.logger.warning(f"[DOC_FILLER] Unknown pattern '{input_pattern}', using fallback")
-            return self._fill_word_paragraph(doc, field_id, value)
+            return self._fill_word_paragraph(paragraphs, field_id, value)
             
         except Exception as e:
             self.logger.warning(f"[DOC_FILLER] Pattern-based paragraph fill error: {e}")
             # フォールバックとして既存メソッドを試す
             try:
-                return self._fill_word_paragraph(doc, field_id, value)
+                return self._fill_word_paragraph(paragraphs, field_id, value)
             except:
                 return False
     
     def _create_output_path(self, original_path: str, user_id: str, ext: str) -> str:
-        """出力ファイルパスを生成"""
+        """
+        出力ファイルパスを生成する。
+        
+        同じ秒に同じテンプレートから複数出力する場合（fill_batch等）に備え、
+        空ファイルを排他的に作成してパスを確保し、衝突時は連番を付ける。
+        """
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         original_name = os.path.splitext(os.path.basename(original_path))[0]
         
         user_dir = os.path.join(self.output_dir, user_id or "default")
         os.makedirs(user_dir, exist_ok=True)
         
-        output_name = f"{original_name}_filled_{timestamp}.{ext}"
-        return os.path.join(user_dir, output_name)
+        base_name = f"{original_name}_filled_{timestamp}"
+        for seq in itertools.count():
+            output_name = f"{base_name}.{ext}" if seq == 0 else f"{base_name}_{seq + 1}.{ext}"
+            output_path = os.path.join(user_dir, output_name)
+            try:
+                os.close(os.open(output_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return output_path
+            except FileExistsError:
+                continue
+    
+    def _discard_output(self, output_path: Optional[str]) -> None:
+        """
+        入力が完了しなかった場合に、_create_output_pathで確保した出力ファイルを削除する
+        （空のファイルがユーザーに渡らないように）。
+        """
+        if output_path is None:
+            return
+        try:
+            os.remove(output_path)
+        except FileNotFoundError:
+            pass
     
+    @_log_slow_call
     def cleanup_old_files(self, max_age_hours: int = 24):
         """古い出力ファイルを削除"""
         try:
-            import time
-            
-            current_time = time.time()
-            max_age_seconds = max_age_hours * 3600
+            cutoff = time.time() - max_age_hours * 3600
+            old_files = list(self._iter_old_files(self.output_dir, cutoff))
+            if not old_files:
+                return
             
-            for root, dirs, files in os.walk(self.output_dir):
-                for filename in files:
-                    file_path = os.path.join(root, filename)
-                    file_age = current_time - os.path.getmtime(file_path)
-                    
-                    if file_age > max_age_seconds:
-                        os.remove(file_path)
+            max_workers = min(len(old_files), self.BATCH_MAX_WORKERS)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for filename in executor.map(self._remove_old_file, old_files):
+                    if filename is not None:
                         self.logger.info(f"[DOC_FILLER] Cleaned up old file: {filename}")
                         
         except Exception as e:
             self.logger.warning(f"[DOC_FILLER] Cleanup error: {e}")
     
+    def _remove_old_file(self, entry: os.DirEntry) -> Optional[str]:
+        """
+        古い出力ファイルを1件削除し、ファイル名を返す。
+        走査後に別のクリーンアップ等で既に消えていた場合はNone（残りの削除は続ける）。
+        """
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            return None
+        return entry.name
+    
+    def _iter_old_files(self, root: str, cutoff: float):
+        """
+        root以下で最終更新がcutoffより古いファイルのDirEntryを返す。
+        DirEntryがキャッシュするstat結果を使うため、ファイルごとのstatは1回で済む。
+        走査中に消えたディレクトリ・ファイルは飛ばす（一覧の途中で全体が止まらないように）。
+        """
+        try:
+            entries = os.scandir(root)
+        except FileNotFoundError:
+            return
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from self._iter_old_files(entry.path, cutoff)
+                elif entry.is_file(follow_symlinks=False):
+                    try:
+                        mtime = entry.stat(follow_symlinks=False).st_mtime
+                    except FileNotFoundError:
+                        continue
+                    if mtime < cutoff:
+                        yield entry
+    
     def _get_concern_comment_text(self, concern_type: str, concern_reason: str, field_name: str) -> str:
         """
         懸念点タイプに応じたコメントテキストを生成する。
@@ -672,94 +1676,8 @@ class DocumentFiller:
         Returns:
             コメントテキスト
         """
-        type_labels = {
-            "missing_info": "⚠️ 情報不足",
-            "uncertain": "❓ 要確認",
-            "length_exceeded": "📏 文字数超過",
-            "truncated": "✂️ 回答省略"
-        }
-        
-        type_label = type_labels.get(concern_type, "⚠️ 懸念あり")
-        
-        comment = f"""【{type_label}】
-項目: {field_name}
-理由: {concern_reason}
-
-※ 内容をご確認のうえ、必要に応じて修正してください。
-(自動生成: Shadow Director AI)"""
-        
-        return comment
-    
-    def _add_word_concerns_section(self, doc, concerns_list: list):
-        """
-        Wordドキュメント末尾に懸念点一覧セクションを追加する。
-        
-        Args:
-            doc: Wordドキュメント
-            concerns_list: 懸念点情報のリスト
-        """
-        try:
-            from docx.shared import Pt, RGBColor
-            from docx.enum.text import WD_ALIGN_PARAGRAPH
-        except ImportError:
-            self.logger.warning("[DOC_FILLER] Failed to import docx components for concerns section")
-            return
-        
-        try:
-            # 区切り線として空白行を追加
-            doc.add_paragraph("")
-            doc.add_paragraph("─" * 40)
-            
-            # タイトル段落
-            title_para = doc.add_paragraph()
-            title_run = title_para.add_run("📋 Shadow Director AI - 懸念点一覧")
-            title_run.bold = True
-            title_run.font.size = Pt(12)
-            
-            # 説明
-            desc_para = doc.add_paragraph()
-            desc_run = desc_para.add_run("以下の項目については、内容をご確認のうえ必要に応じて修正してください。")
-            desc_run.font.size = Pt(10)
-            desc_run.font.color.rgb = RGBColor(100, 100, 100)
-            
-            # 懸念点リスト
-            type_labels = {
-                "missing_info": "⚠️ 情報不足",
-                "uncertain": "❓ 要確認",
-                "length_exceeded": "📏 文字数超過",
-                "truncated": "✂️ 回答省略"
-            }
-            
-            for concern in concerns_list:
-                number = concern["number"]
-                field_name = concern["field_name"]
-                concern_type = concern["concern_type"]
-                concern_reason = concern["concern_reason"]
-                
-                type_label = type_labels.get(concern_type, "⚠️ 懸念あり")
-                
-                item_para = doc.add_paragraph()
-                item_run = item_para.add_run(f"[※{number}] 【{type_label}】{field_name}")
-                item_run.bold = True
-                item_run.font.size = Pt(10)
-                
-                reason_para = doc.add_paragraph()
-                reason_run = reason_para.add_run(f"    → {concern_reason}")
-                reason_run.font.size = Pt(9)
-                reason_run.font.color.rgb = RGBColor(80, 80, 80)
-            
-            # フッター
-            doc.add_paragraph("")
-            footer_para = doc.add_paragraph()
-            footer_run = footer_para.add_run("※ この懸念点一覧は提出前に削除してください。")
-            footer_run.font.size = Pt(8)
-            footer_run.font.color.rgb = RGBColor(150, 150, 150)
-            footer_run.italic = True
-            
-            self.logger.info(f"[DOC_FILLER] Added concerns section with {len(concerns_list)} items")
-            
-        except Exception as e:
-            self.logger.warning(f"[DOC_FILLER] Failed to add concerns section: {e}")
+        # AIの出力によってはリスト等の非文字列が来るため、キャッシュキーにする前に文字列化する
+        return _build_concern_comment(str(concern_type), str(concern_reason), str(field_name))
     
     def _init_comments_part(self, doc):
         """
@@ -767,204 +1685,156 @@ class DocumentFiller:
         python-docxは標準でcomments.xmlを作成しないため、OOXMLで追加する。
         """
         try:
-            from docx.opc.constants import RELATIONSHIP_TYPE as RT
-            from docx.parts.document import DocumentPart
-            
             # コメントパーツが既に存在するかチェック
             document_part = doc.part
             
             # comments関係を探す
             for rel in document_part.rels.values():
-                if 'comments' in rel.reltype:
+                if rel.reltype == RT.COMMENTS:
                     self.logger.debug("[DOC_FILLER] Comments part already exists")
                     return
             
             self.logger.debug("[DOC_FILLER] Comments part initialized (will be created on save if needed)")
             
         except Exception as e:
-            self.logger.debug(f"[DOC_FILLER] Comments part init skipped: {e}")
+            self.logger.debug("[DOC_FILLER] Comments part init skipped: %s", e)
     
-    def _add_word_native_comment(self, doc, paragraph, comment_text: str, comment_id: int):
+    def _add_word_native_comments(
+        self,
+        doc,
+        concerns_to_add: List[Dict[str, Any]],
+        comment_date: Optional[str] = None
+    ):
         """
-        Wordドキュメントにネイティブコメントを追加する（OOXML直接操作）。
+        懸念点コメントをまとめて追加する。
+        
+        段落へのマーカー挿入時は (コメントID, 本文) を溜めるだけにし、
+        コメント本体（w:comment）は最後に_flush_commentsで1回のパースで作ってcomments要素に追加する。
         
         Args:
             doc: Wordドキュメント
-            paragraph: コメントを追加する段落
-            comment_text: コメントテキスト
-            comment_id: コメントID（0から始まる連番）
-        """
-        try:
-            from docx.oxml.ns import qn, nsmap
-            from docx.oxml import OxmlElement
-            from datetime import datetime
-            
-            # Word namespace
-            w_ns = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
-            
-            # コメントIDを文字列に
-            cid = str(comment_id)
-            
-            # 段落にコメント参照マーカーを追加
-            # commentRangeStart要素を作成
-            comment_range_start = OxmlElement('w:commentRangeStart')
-            comment_range_start.set(qn('w:id'), cid)
-            
-            # commentRangeEnd要素を作成
-            comment_range_end = OxmlElement('w:commentRangeEnd')
-            comment_range_end.set(qn('w:id'), cid)
-            
-            # commentReference要素を作成（w:r 内に入れ、rPrも必須）
-            comment_ref_run = OxmlElement('w:r')
-            
-            # ランプロパティ (w:rPr) を追加 - フォントサイズのみ設定（スタイル参照は避ける）
-            run_props = OxmlElement('w:rPr')
-            # コメント参照は通常8pt程度の上付き文字
-            sz = OxmlElement('w:sz')
-            sz.set(qn('w:val'), '16')  # 8pt = 16 half-points
-            run_props.append(sz)
-            szCs = OxmlElement('w:szCs')
-            szCs.set(qn('w:val'), '16')
-            run_props.append(szCs)
-            comment_ref_run.append(run_props)
-            
-            # commentReference を追加
-            comment_ref = OxmlElement('w:commentReference')
-            comment_ref.set(qn('w:id'), cid)
-            comment_ref_run.append(comment_ref)
-            
-            # 段落の最初と最後にマーカーを挿入
-            para_element = paragraph._p
-            
-            # pPr（段落プロパティ）がある場合、その後に挿入
-            # pPrがない場合は最初に挿入
-            pPr = para_element.find(qn('w:pPr'))
-            if pPr is not None:
-                # pPrの次に挿入
-                pPr_index = list(para_element).index(pPr)
-                para_element.insert(pPr_index + 1, comment_range_start)
-            elif len(para_element) > 0:
-                para_element.insert(0, comment_range_start)
-            else:
-                para_element.append(comment_range_start)
-            
-            # 段落の最後にcommentRangeEndとcommentReferenceを追加
-            para_element.append(comment_range_end)
-            para_element.append(comment_ref_run)
+            concerns_to_add: {"paragraph", "field_name", "concern_type", "concern_reason"} のリスト
+            comment_date: コメントの日時（w:date）。省略時は現在時刻
             
-            # comments.xmlにコメント本体を追加
-            self._add_comment_to_comments_part(doc, cid, comment_text)
-            
-            self.logger.debug(f"[DOC_FILLER] Added native comment {cid} to paragraph")
+        Returns:
+            comments要素に追加したコメント数（インライン表記にフォールバックした分は含まない）
+        """
+        comments_element = self._get_or_create_comments_element(doc)
+        if comments_element is None:
+            self.logger.warning("[DOC_FILLER] Could not get/create comments element")
+        
+        pending_comments: List[Tuple[str, str]] = []
+        for idx, concern in enumerate(concerns_to_add):
+            comment_text = self._get_concern_comment_text(
+                concern["concern_type"], 
+                concern["concern_reason"], 
+                concern["field_name"]
+            )
+            if comments_element is None:
+                self._add_inline_comment_fallback(concern["paragraph"], comment_text)
+                continue
             
-        except Exception as e:
-            self.logger.warning(f"[DOC_FILLER] Failed to add native comment: {e}")
-            # フォールバック: 段落末尾にコメントテキストを追加
             try:
-                from docx.shared import Pt, RGBColor
-                run = paragraph.add_run(f" [※コメント: {comment_text[:50]}...]")
-                run.font.size = Pt(8)
-                run.font.color.rgb = RGBColor(128, 128, 128)
-                run.italic = True
-            except:
-                pass
+                # XMLにできない本文はマーカーを入れる前に弾く（後でまとめてパースするため）
+                if _XML_INVALID_CHAR_RE.search(comment_text):
+                    raise ValueError("comment text contains characters not allowed in XML")
+                cid = str(idx)
+                self._add_word_comment_markers(concern["paragraph"], cid)
+                pending_comments.append((cid, comment_text))
+            except Exception as e:
+                self.logger.warning(f"[DOC_FILLER] Failed to add native comment: {e}")
+                self._add_inline_comment_fallback(concern["paragraph"], comment_text)
+        
+        if pending_comments:
+            self._flush_comments(comments_element, pending_comments, comment_date or _comment_timestamp())
+        return len(pending_comments)
     
-    def _add_comment_to_comments_part(self, doc, comment_id: str, comment_text: str):
+    def _flush_comments(self, comments_element, pending_comments: List[Tuple[str, str]], comment_date: str):
         """
-        comments.xmlにコメント本体を追加する。
+        溜めたコメントからw:commentをまとめて作り、comments要素に一度に追加する。
         
         Args:
-            doc: Wordドキュメント
-            comment_id: コメントID
-            comment_text: コメントテキスト
+            comments_element: comments.xmlのルート要素（w:comments）
+            pending_comments: (コメントID, コメントテキスト) のリスト
+            comment_date: コメントの日時（w:date）
+        """
+        fragment = parse_xml(_COMMENTS_FRAGMENT_TEMPLATE.format(
+            comments=''.join(_comment_xml(cid, text, comment_date) for cid, text in pending_comments)
+        ))
+        
+        # commentsに追加
+        comments_element.extend(list(fragment))
+        self.logger.debug("[DOC_FILLER] Added %s comments to comments.xml", len(pending_comments))
+    
+    def _add_word_comment_markers(self, paragraph, cid: str):
+        """
+        段落にコメント範囲（commentRangeStart / End）と参照（commentReference）を挿入する。
+        
+        Args:
+            paragraph: コメントを追加する段落
+            cid: コメントID
         """
+        # commentRangeStart / commentRangeEnd / commentReference（rPr付きのw:r）を一度にパース
+        comment_range_start, comment_range_end, comment_ref_run = parse_xml(
+            _COMMENT_MARKERS_TEMPLATE.format(cid=_escape_xml_attr(cid))
+        )
+        
+        # 段落の最初と最後にマーカーを挿入
+        para_element = paragraph._p
+        
+        # pPr（段落プロパティ）がある場合、その後に挿入
+        # pPrがない場合は最初に挿入
+        # pPrがあれば必ず先頭の子要素なので、find で走査せず [0] のタグだけを見る
+        first = para_element[0] if len(para_element) else None
+        pPr = first if first is not None and first.tag == _QN_W_PPR else None
+        if pPr is not None:
+            # pPrの次に挿入（子要素のリストを作らずに直後へ繋ぐ）
+            pPr.addnext(comment_range_start)
+        else:
+            para_element.insert(0, comment_range_start)
+        
+        # 段落の最後にcommentRangeEndとcommentReferenceを追加
+        para_element.append(comment_range_end)
+        comment_range_end.addnext(comment_ref_run)
+    
+    def _add_inline_comment_fallback(self, paragraph, comment_text: str):
+        """ネイティブコメントを付けられない場合、段落末尾にコメントテキストを追加する"""
         try:
-            from docx.oxml.ns import qn
-            from docx.oxml import OxmlElement
-            from datetime import datetime
-            from lxml import etree
-            
-            document_part = doc.part
-            
-            # comments要素を取得または作成
-            comments_element = self._get_or_create_comments_element(doc)
-            if comments_element is None:
-                self.logger.warning("[DOC_FILLER] Could not get/create comments element")
-                return
-            
-            # コメント要素を作成
-            comment = OxmlElement('w:comment')
-            comment.set(qn('w:id'), comment_id)
-            comment.set(qn('w:author'), 'Shadow Director AI')
-            comment.set(qn('w:date'), datetime.now().strftime('%Y-%m-%dT%H:%M:%SZ'))
-            comment.set(qn('w:initials'), 'SD')
-            
-            # コメント本文を段落として追加
-            # 複数行がある場合は分割
-            lines = comment_text.split('\n')
-            
-            for line in lines:
-                comment_para = OxmlElement('w:p')
-                
-                # 段落プロパティ (w:pPr) を追加
-                para_props = OxmlElement('w:pPr')
-                comment_para.append(para_props)
-                
-                if line.strip():
-                    comment_run = OxmlElement('w:r')
-                    
-                    # ランプロパティ (w:rPr) を追加 - これが欠落するとエラーになる
-                    run_props = OxmlElement('w:rPr')
-                    run_props_lang = OxmlElement('w:lang')
-                    run_props_lang.set(qn('w:val'), 'ja-JP')
-                    run_props.append(run_props_lang)
-                    comment_run.append(run_props)
-                    
-                    # テキスト要素を作成
-                    comment_text_elem = OxmlElement('w:t')
-                    comment_text_elem.set('{http://www.w3.org/XML/1998/namespace}space', 'preserve')
-                    comment_text_elem.text = line
-                    comment_run.append(comment_text_elem)
-                    
-                    comment_para.append(comment_run)
-                
-                comment.append(comment_para)
-            
-            # commentsに追加
-            comments_element.append(comment)
-            
-            self.logger.debug(f"[DOC_FILLER] Added comment {comment_id} to comments.xml")
-            
-        except Exception as e:
-            self.logger.warning(f"[DOC_FILLER] Failed to add comment to comments part: {e}")
+            run = paragraph.add_run(f" [※コメント: {comment_text[:50]}...]")
+            run.font.size = Pt(8)
+            run.font.color.rgb = RGBColor(128, 128, 128)
+            run.italic = True
+        except Exception:
+            pass
     
     def _get_or_create_comments_element(self, doc):
         """
         comments.xmlのルート要素を取得または作成する。
         """
         try:
-            from docx.opc.constants import RELATIONSHIP_TYPE as RT
-            from docx.oxml.ns import qn
-            from docx.oxml import OxmlElement
-            from lxml import etree
-            import zipfile
-            import io
-            
             document_part = doc.part
             
-            # 既存のコメントパーツを探す
-            for rel in document_part.rels.values():
-                if 'comments' in rel.reltype:
-                    return rel.target_part._element
+            # 既存のコメントパーツを探す（本文パーツのみ読み込んだ場合はパッケージがない）
+            if document_part is not None:
+                try:
+                    existing = self._comments_part_cache[document_part]
+                except KeyError:
+                    existing = None
+                    for rel in document_part.rels.values():
+                        if rel.reltype == RT.COMMENTS:
+                            existing = rel.target_part._element
+                            break
+                    self._comments_part_cache[document_part] = existing
+                if existing is not None:
+                    return existing
             
             # コメントパーツがない場合は、ドキュメント自体にcommentsを埋め込む方式を試す
             # (python-docxの制限により、新規パーツ追加は複雑なため)
             
             # 代替手段: 属性としてcommentsを保持
             if not hasattr(doc, '_comments_element'):
-                # 新しいcomments要素を作成
-                comments = OxmlElement('w:comments')
-                doc._comments_element = comments
+                # 新しいcomments要素を作成（そのままcomments.xmlとして直列化できるルート）
+                doc._comments_element = parse_xml(_COMMENTS_ROOT_XML)
             
             return doc._comments_element
             
@@ -972,41 +1842,82 @@ class DocumentFiller:
             self.logger.warning(f"[DOC_FILLER] Failed to get/create comments element: {e}")
             return None
     
-    def _fill_word_table_cell_with_para(self, doc, field_id: str, value: str, input_length_type: str = "unknown") -> Tuple[bool, Optional[Any]]:
+    def _prepare_doc_index(self, doc, field_ids) -> Tuple[List[List[Any]], List[Any]]:
+        """
+        fill_word 1回分の本文インデックスを作る。
+        
+        入力対象のテーブルだけ行リストを作り、対象外のテーブルは空リストにしておく
+        （テーブル番号はそのまま添字として使える）。"para_N" がなければ段落リストも作らない。
+        
+        Args:
+            field_ids: 入力するフィールドIDの一覧
+        
+        Returns:
+            (テーブルごとの行リスト, 段落リスト)
+        """
+        target_tables = set()
+        has_para_fields = False
+        for field_id in field_ids:
+            if field_id.startswith("table"):
+                parsed = _parse_table_field_id(field_id)
+                if parsed is not None:
+                    target_tables.add(parsed[0])
+            elif field_id.startswith("para_"):
+                has_para_fields = True
+        
+        table_rows = []
+        if target_tables:
+            table_rows = [
+                list(table.rows) if table_idx in target_tables else []
+                for table_idx, table in enumerate(doc.tables)
+            ]
+        paragraphs = doc.paragraphs if has_para_fields else []
+        return table_rows, paragraphs
+    
+    def _fill_word_table_cell_with_para(
+        self,
+        table_rows: List[List[Any]],
+        field_id: str,
+        value: str,
+        input_length_type: str = "unknown",
+        row_cells: Optional[Dict[Tuple[int, int], Tuple[Any, ...]]] = None
+    ) -> Tuple[bool, Optional[Any]]:
         """
         Wordテーブルセルに入力し、対象の段落を返す。
         
         Args:
-            doc: Wordドキュメント
+            table_rows: テーブルごとの行リスト（_prepare_doc_index）
             field_id: フィールドID（"tableN_行_列"形式）
             value: 入力値
             input_length_type: "short"（短文）, "long"（長文）, "unknown"
+            row_cells: 取得済みの行のセル {(テーブル番号, 行): cells}。同じ行の2つ目以降のセルで再利用する
             
         Returns:
             (成功フラグ, 対象段落)
         """
         try:
             # "tableN_行_列" をパース
-            parts = field_id.split('_')
-            if len(parts) != 3:
+            parsed = _parse_table_field_id(field_id)
+            if parsed is None:
                 return False, None
             
-            table_part = parts[0]  # "tableN"
-            row = int(parts[1])
-            col = int(parts[2])
-            table_idx = int(table_part.replace("table", ""))
+            table_idx, row, col = parsed
             
-            if table_idx >= len(doc.tables):
+            if table_idx >= len(table_rows):
                 self.logger.warning(f"[DOC_FILLER] Table {table_idx} not found")
                 return False, None
             
-            table = doc.tables[table_idx]
+            rows = table_rows[table_idx]
             
-            if row >= len(table.rows):
+            if row >= len(rows):
                 self.logger.warning(f"[DOC_FILLER] Row {row} not found in table {table_idx}")
                 return False, None
             
-            cells = table.rows[row].cells
+            cells = row_cells.get((table_idx, row)) if row_cells is not None else None
+            if cells is None:
+                cells = rows[row].cells
+                if row_cells is not None:
+                    row_cells[(table_idx, row)] = cells
             if col >= len(cells):
                 self.logger.warning(f"[DOC_FILLER] Col {col} not found in table {table_idx}, row {row}")
                 return False, None
@@ -1016,7 +1927,7 @@ class DocumentFiller:
             # 長文の場合、テーブルセル内に収まるように処理
             if input_length_type == "short" and len(value) > 50:
                 value = value[:47] + "..."
-                self.logger.debug(f"[DOC_FILLER] Trimmed long value for short field: {field_id}")
+                self.logger.debug("[DOC_FILLER] Trimmed long value for short field: %s", field_id)
             
             # 既存テキストをクリアして新しいテキストを設定
             target_para = None
@@ -1037,7 +1948,7 @@ class DocumentFiller:
     
     def _fill_word_paragraph_with_pattern_and_para(
         self, 
-        doc, 
+        paragraphs: List[Any], 
         field_id: str, 
         value: str, 
         input_pattern: str,
@@ -1047,7 +1958,7 @@ class DocumentFiller:
         VLMで検出された入力パターンに基づいてWord段落に入力し、段落を返す。
         
         Args:
-            doc: Wordドキュメント
+            paragraphs: 本文の段落リスト（doc.paragraphs）
             field_id: フィールドID（"para_N"形式）
             value: 入力値
             input_pattern: 入力パターン
@@ -1057,18 +1968,16 @@ class DocumentFiller:
             (成功フラグ, 対象段落)
         """
         try:
-            import re
-            
             # パターンに応じた処理
             para_idx = location.get("paragraph_idx")
             if para_idx is None:
-                para_idx = int(field_id.replace("para_", ""))
+                para_idx = _parse_para_field_id(field_id)
             
-            if para_idx >= len(doc.paragraphs):
+            if para_idx >= len(paragraphs):
                 self.logger.warning(f"[DOC_FILLER] Paragraph {para_idx} not found")
                 return False, None
             
-            para = doc.paragraphs[para_idx]
+            para = paragraphs[para_idx]
             original_text = para.text
             
             # スタイルを取得
@@ -1078,39 +1987,35 @@ class DocumentFiller:
             filled = False
             
             if input_pattern == "next_line":
-                para.clear()
-                self._add_run_with_style(para, value, style)
+                self._replace_paragraph_text(para, original_text, value, style)
                 filled = True
             elif input_pattern == "underline":
-                new_text = re.sub(r'[_＿]{2,}', value, original_text)
+                new_text = original_text
+                if '_' in original_text or '＿' in original_text:
+                    new_text, _ = _subn_folded(_UNDERLINE_SHORT_RE, value, original_text)
                 if new_text != original_text:
-                    para.clear()
-                    self._add_run_with_style(para, new_text, style)
+                    self._replace_paragraph_text(para, original_text, new_text, style)
                     filled = True
                 else:
                     input_pattern = "inline"
             elif input_pattern == "bracket":
-                new_text = re.sub(r'[(（]\s*[　\s]*[)）]', f'（{value}）', original_text)
+                # 空括弧を優先し、なければヒント付き括弧を置換する
+                folded = original_text.translate(_ZEN2HAN)
+                new_text = original_text
+                if '(' in folded:
+                    new_text, _ = _subn_brackets(f'（{value}）', original_text, folded)
                 if new_text != original_text:
-                    para.clear()
-                    self._add_run_with_style(para, new_text, style)
+                    self._replace_paragraph_text(para, original_text, new_text, style)
                     filled = True
                 else:
-                    new_text = re.sub(r'[(（][^)）]+[)）]', f'（{value}）', original_text)
-                    if new_text != original_text:
-                        para.clear()
-                        self._add_run_with_style(para, new_text, style)
-                        filled = True
-                    else:
-                        input_pattern = "inline"
+                    input_pattern = "inline"
             
             if input_pattern == "inline":
-                colon_match = re.match(r'^(.+?[:：])\s*(.*)$', original_text)
+                colon_match = _COLON_SPLIT_RE.match(original_text)
                 if colon_match:
                     prefix = colon_match.group(1)
                     new_text = f"{prefix} {value}"
-                    para.clear()
-                    self._add_run_with_style(para, new_text, style)
+                    self._replace_paragraph_text(para, original_text, new_text, style)
                     filled = True
                 else:
                     self._add_run_with_style(para, f" {value}", style)
@@ -1118,7 +2023,7 @@ class DocumentFiller:
             
             if not filled:
                 # フォールバック
-                success = self._fill_word_paragraph(doc, field_id, value)
+                success = self._fill_word_paragraph(paragraphs, field_id, value)
                 return success, para if success else None
             
             return filled, para
@@ -1129,182 +2034,93 @@ class DocumentFiller:
     
     def _inject_comments_to_docx(self, docx_path: str, comments_element):
         """
-        保存後のdocxファイルにcomments.xmlを注入する。
+        保存済みのdocxファイルにcomments.xmlを注入する。
         
-        python-docxはcomments.xmlを保存しないため、ZIPファイル操作で挿入する。
+        fill_wordは保存時に_write_docxで直接注入するため、これは単体で
+        既存ファイルに注入する場合の入口。
         
         Args:
             docx_path: 保存済みのdocxファイルパス
             comments_element: コメント要素（w:comments）
         """
+        # コメントがない場合はスキップ
+        if len(comments_element) == 0:
+            self.logger.debug("[DOC_FILLER] No comments to inject")
+            return
+        
+        # _write_docxは一時ファイルに書き出してから置き換えるため、元のファイルへそのまま書き戻せる
         try:
-            import zipfile
-            import tempfile
-            from lxml import etree
-            
-            # コメントがない場合はスキップ
-            if len(comments_element) == 0:
-                self.logger.debug("[DOC_FILLER] No comments to inject")
-                return
-            
-            # 一時ファイルを作成
-            temp_path = docx_path + ".tmp"
-            
-            # 正しいOOXML形式のcomments.xmlを手動で構築
-            comments_xml = self._build_comments_xml(comments_element)
-            
-            # 既存のdocxを読み込んで新しいファイルに書き出し
-            with zipfile.ZipFile(docx_path, 'r') as zin:
-                with zipfile.ZipFile(temp_path, 'w', zipfile.ZIP_DEFLATED) as zout:
-                    for item in zin.infolist():
-                        if item.filename == 'word/_rels/document.xml.rels':
-                            # リレーションシップファイルにコメント参照を追加
-                            content = zin.read(item.filename).decode('utf-8')
-                            content = self._add_comments_relationship(content)
-                            zout.writestr(item, content.encode('utf-8'))
-                        elif item.filename == '[Content_Types].xml':
-                            # Content_Typesにコメントタイプを追加
-                            content = zin.read(item.filename).decode('utf-8')
-                            content = self._add_comments_content_type(content)
-                            zout.writestr(item, content.encode('utf-8'))
-                        else:
-                            # その他のファイルはそのままコピー
-                            zout.writestr(item, zin.read(item.filename))
-                    
-                    # comments.xmlを追加
-                    zout.writestr('word/comments.xml', comments_xml.encode('utf-8'))
-            
-            # 元のファイルを置き換え
-            import os
-            os.replace(temp_path, docx_path)
-            
-            self.logger.info(f"[DOC_FILLER] Injected {len(comments_element)} comments to docx")
-            
+            self._write_docx(docx_path, docx_path, comments_element=comments_element)
         except Exception as e:
             self.logger.warning(f"[DOC_FILLER] Failed to inject comments: {e}")
-            # 一時ファイルがあれば削除
-            try:
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
-            except:
-                pass
     
-    def _add_comments_relationship(self, rels_content: str) -> str:
+    def _add_comments_relationship(self, rels_content: bytes) -> bytes:
         """
         document.xml.relsにコメント参照を追加する。
-        シンプルな文字列置換方式で信頼性を向上。
+        デコードせず、バイト列のまま末尾の閉じタグの直前に差し込む。
         """
         try:
             # 既にコメント参照がある場合はスキップ
-            if 'comments.xml' in rels_content:
+            if b'comments.xml' in rels_content:
                 self.logger.debug("[DOC_FILLER] Comments relationship already exists")
                 return rels_content
             
-            import re
-            
             # 既存のrIdを抽出して最大値を取得
-            rids = re.findall(r'Id="rId(\d+)"', rels_content)
-            max_rid = max([int(r) for r in rids]) if rids else 0
-            new_rid = max_rid + 1
+            new_rid = max(map(int, _RID_RE.findall(rels_content)), default=0) + 1
             
             # 新しいリレーションシップを構築
-            new_rel = f'<Relationship Id="rId{new_rid}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/comments" Target="comments.xml"/>'
+            new_rel = f'<Relationship Id="rId{new_rid}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/comments" Target="comments.xml"/>'.encode()
             
-            # </Relationships>の前に挿入
-            if '</Relationships>' in rels_content:
-                rels_content = rels_content.replace('</Relationships>', f'{new_rel}</Relationships>')
-                self.logger.info(f"[DOC_FILLER] Added comments relationship as rId{new_rid}")
-            else:
+            # 末尾の</Relationships>の前に挿入
+            head, sep, tail = rels_content.rpartition(b'</Relationships>')
+            if not sep:
                 self.logger.warning("[DOC_FILLER] Could not find </Relationships> tag")
+                return rels_content
             
-            return rels_content
+            self.logger.info(f"[DOC_FILLER] Added comments relationship as rId{new_rid}")
+            return head + new_rel + sep + tail
             
         except Exception as e:
             self.logger.warning(f"[DOC_FILLER] Failed to add comments relationship: {e}")
             return rels_content
     
-    def _add_comments_content_type(self, content_types: str) -> str:
+    def _add_comments_content_type(self, content_types: bytes) -> bytes:
         """
         [Content_Types].xmlにコメントのコンテンツタイプを追加する。
-        シンプルな文字列置換方式で信頼性を向上。
+        デコードせず、バイト列のまま末尾の閉じタグの直前に差し込む。
         """
         try:
             # 既にコメントタイプがある場合はスキップ
-            if 'comments.xml' in content_types:
+            if b'comments.xml' in content_types:
                 self.logger.debug("[DOC_FILLER] Comments content type already exists")
                 return content_types
             
             # 新しいオーバーライドを構築
-            new_override = '<Override PartName="/word/comments.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.comments+xml"/>'
+            new_override = b'<Override PartName="/word/comments.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.comments+xml"/>'
             
-            # </Types>の前に挿入
-            if '</Types>' in content_types:
-                content_types = content_types.replace('</Types>', f'{new_override}</Types>')
-                self.logger.info("[DOC_FILLER] Added comments content type to [Content_Types].xml")
-            else:
+            # 末尾の</Types>の前に挿入
+            head, sep, tail = content_types.rpartition(b'</Types>')
+            if not sep:
                 self.logger.warning("[DOC_FILLER] Could not find </Types> tag")
+                return content_types
             
-            return content_types
+            self.logger.info("[DOC_FILLER] Added comments content type to [Content_Types].xml")
+            return head + new_override + sep + tail
             
         except Exception as e:
             self.logger.warning(f"[DOC_FILLER] Failed to add comments content type: {e}")
             return content_types
     
-    def _build_comments_xml(self, comments_element) -> str:
+    def _build_comments_xml(self, comments_element) -> bytes:
         """
         コメント要素から正しいOOXML形式のcomments.xmlを構築する。
         
         Args:
-            comments_element: コメント要素のリスト
+            comments_element: comments.xmlのルート要素（w:comments）
             
         Returns:
-            comments.xmlの内容
-        """
-        from docx.oxml.ns import qn
-        import html
-        
-        xml_parts = [
-            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>',
-            '<w:comments xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" ',
-            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships" ',
-            'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006" ',
-            'xmlns:w14="http://schemas.microsoft.com/office/word/2010/wordml">',
-        ]
-        
-        for comment in comments_element:
-            # コメント属性を取得
-            comment_id = comment.get(qn('w:id'), '0')
-            author = comment.get(qn('w:author'), 'Shadow Director AI')
-            date = comment.get(qn('w:date'), '')
-            initials = comment.get(qn('w:initials'), 'SD')
-            
-            # コメント開始タグ
-            xml_parts.append(f'<w:comment w:id="{comment_id}" w:author="{html.escape(author)}" w:date="{date}" w:initials="{initials}">')
-            
-            # 各段落を処理
-            for para in comment:
-                if para.tag.endswith('}p') or para.tag == 'w:p':
-                    xml_parts.append('<w:p>')
-                    xml_parts.append('<w:pPr/>')
-                    
-                    # ラン要素を処理
-                    for run in para:
-                        if run.tag.endswith('}r') or run.tag == 'w:r':
-                            xml_parts.append('<w:r>')
-                            xml_parts.append('<w:rPr><w:lang w:val="ja-JP"/></w:rPr>')
-                            
-                            # テキスト要素を処理
-                            for text_elem in run:
-                                if text_elem.tag.endswith('}t') or text_elem.tag == 'w:t':
-                                    text_content = text_elem.text or ''
-                                    xml_parts.append(f'<w:t xml:space="preserve">{html.escape(text_content)}</w:t>')
-                            
-                            xml_parts.append('</w:r>')
-                    
-                    xml_parts.append('</w:p>')
-            
-            xml_parts.append('</w:comment>')
-        
-        xml_parts.append('</w:comments>')
-        
-        return '\n'.join(xml_parts)
+            comments.xmlの内容（UTF-8のバイト列）
+        """
+        return etree.tostring(
+            comments_element, xml_declaration=True, encoding='UTF-8', standalone=True
+        )
@@ -1,10 +1,39 @@
 import os
 import logging
+import re
+import shutil
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
+from urllib3.util.retry import Retry
 from typing import Optional, Tuple
 from pathlib import Path
+from urllib.parse import unquote, urljoin, urlparse
 import tempfile
 
+
+class _LimitedReader:
+    """
+    File-like wrapper around a raw response stream that stops reading once more
+    than `limit` bytes have been read, so shutil.copyfileobj can enforce a size cap.
+    """
+    
+    def __init__(self, raw, limit: int):
+        self._raw = raw
+        self._limit = limit
+        self.total = 0
+        self.exceeded = False
+    
+    def read(self, size: int = -1) -> bytes:
+        data = self._raw.read(size)
+        self.total += len(data)
+        if self.total > self._limit:
+            # Returning b'' ends copyfileobj; the caller checks `exceeded`
+            self.exceeded = True
+            return b''
+        return data
+
+
 class FileDownloader:
     """
     Helper class to download grant application format files from URLs.
@@ -25,6 +54,18 @@ class FileDownloader:
         '.txt': 'text/plain',
     }
     
+    # Sent with every request to mimic a browser
+    USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+    
+    # filename from a Content-Disposition header
+    _FILENAME_CD_RE = re.compile(r'filename="?([^"]+)"?')
+    # href="..." / href='...' links ending in one of SUPPORTED_EXTENSIONS
+    # e.g. href=["']([^"']+\.(?:pdf|doc|docx|xls|xlsx|zip|txt))["']
+    _LINK_RE = re.compile(
+        r'href=["\']([^"\']+\.(?:' + '|'.join(ext.lstrip('.') for ext in SUPPORTED_EXTENSIONS) + r'))["\']',
+        re.IGNORECASE,
+    )
+    
     def __init__(self, storage_path: Optional[str] = None):
         """
         Initialize FileDownloader.
@@ -43,6 +84,17 @@ class FileDownloader:
         
         # Create storage directory if it doesn't exist
         self.storage_path.mkdir(parents=True, exist_ok=True)
+        
+        # Shared session so HEAD/GET to the same host reuse the kept-alive connection
+        self._session = requests.Session()
+        self._session.headers.update({'User-Agent': self.USER_AGENT})
+        adapter = HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=10,
+            max_retries=Retry(total=2, backoff_factor=0.3),
+        )
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
         self.logger.info(f"FileDownloader initialized with storage: {self.storage_path}")
     
     def validate_url(self, url: str) -> Tuple[bool, str]:
@@ -59,19 +111,13 @@ class FileDownloader:
         """
         try:
             # Basic URL format validation
-            from urllib.parse import urlparse
             parsed = urlparse(url)
             if not parsed.scheme or not parsed.netloc:
                 return (False, "無効なURL形式です")
             
-            # Set headers to mimic a browser request
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            
             # Send HEAD request to check without downloading
             self.logger.info(f"[VALIDATE] Checking URL: {url}")
-            response = requests.head(url, headers=headers, timeout=10, allow_redirects=True)
+            response = self._session.head(url, timeout=10, allow_redirects=True)
             
             # Check status code
             if response.status_code == 404:
@@ -129,19 +175,15 @@ class FileDownloader:
                 self.logger.warning(f"[DOWNLOAD] URL validation failed: {error_msg}")
                 return None
             
-            # Set headers to mimic a browser request
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            
             # Stream the request to check size before downloading
-            response = requests.get(url, headers=headers, stream=True, timeout=30)
+            response = self._session.get(url, stream=True, timeout=30)
             response.raise_for_status()
             
             # Check content length
             content_length = response.headers.get('content-length')
             if content_length and int(content_length) > self.MAX_FILE_SIZE:
                 self.logger.warning(f"[DOWNLOAD] File too large: {content_length} bytes > {self.MAX_FILE_SIZE} bytes")
+                response.close()  # give the pooled connection back without reading the body
                 return None
             
             # Try to determine filename from Content-Disposition header or URL
@@ -151,6 +193,7 @@ class FileDownloader:
             file_ext = Path(filename).suffix.lower()
             if file_ext not in self.SUPPORTED_EXTENSIONS:
                 self.logger.warning(f"[DOWNLOAD] Unsupported file type: {file_ext}")
+                response.close()
                 return None
             
             # Create user-specific directory
@@ -170,20 +213,20 @@ class FileDownloader:
                 filename = file_path.name  # Update filename to include suffix
                 self.logger.info(f"[DOWNLOAD] Duplicate filename detected, renamed to: {filename}")
             
-            # Download file in chunks
-            total_size = 0
+            # Download file in 1MB blocks, decoding gzip/deflate like iter_content did
+            response.raw.decode_content = True
+            reader = _LimitedReader(response.raw, self.MAX_FILE_SIZE)
             with open(file_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        total_size += len(chunk)
-                        
-                        # Check size limit during download
-                        if total_size > self.MAX_FILE_SIZE:
-                            self.logger.warning(f"[DOWNLOAD] File size exceeded during download: {total_size} bytes")
-                            # Clean up partial file
-                            file_path.unlink(missing_ok=True)
-                            return None
+                shutil.copyfileobj(reader, f, length=1024 * 1024)
+            total_size = reader.total
+            
+            # Check size limit during download
+            if reader.exceeded:
+                self.logger.warning(f"[DOWNLOAD] File size exceeded during download: {total_size} bytes")
+                # Clean up partial file
+                file_path.unlink(missing_ok=True)
+                response.close()
+                return None
             
             self.logger.info(f"[DOWNLOAD] Successfully downloaded: {filename} ({total_size} bytes)")
             return (str(file_path), filename)
@@ -191,7 +234,8 @@ class FileDownloader:
         except requests.exceptions.Timeout:
             self.logger.error(f"[DOWNLOAD] Timeout downloading: {url}")
             return None
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, Urllib3HTTPError) as e:
+            # Errors while reading response.raw come from urllib3 directly
             self.logger.error(f"[DOWNLOAD] Request failed: {e}")
             return None
         except Exception as e:
@@ -212,13 +256,11 @@ class FileDownloader:
         # Try Content-Disposition header first
         content_disposition = response.headers.get('content-disposition')
         if content_disposition:
-            import re
-            filename_match = re.findall(r'filename="?([^"]+)"?', content_disposition)
+            filename_match = self._FILENAME_CD_RE.search(content_disposition)
             if filename_match:
-                return filename_match[0]
+                return filename_match.group(1)
         
         # Try to extract from URL
-        from urllib.parse import urlparse, unquote
         parsed_url = urlparse(url)
         url_filename = Path(unquote(parsed_url.path)).name
         
@@ -245,7 +287,6 @@ class FileDownloader:
         """
         user_dir = self.storage_path / user_id
         if user_dir.exists():
-            import shutil
             shutil.rmtree(user_dir)
             self.logger.info(f"[CLEANUP] Cleaned up files for user: {user_id}")
     
@@ -286,10 +327,7 @@ class FileDownloader:
             self.logger.info(f"[FINDER] Scraping page for files: {page_url}")
             
             # Fetch page content
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            response = requests.get(page_url, headers=headers, timeout=10)
+            response = self._session.get(page_url, timeout=10)
             
             if response.status_code != 200:
                 self.logger.warning(f"[FINDER] Failed to fetch page: {response.status_code}")
@@ -299,16 +337,7 @@ class FileDownloader:
             
             # Simple regex to find href links with supported extensions
             # Matches href="val" or href='val'
-            import re
-            from urllib.parse import urljoin
-            
-            # Extensions pattern (without dots) - e.g., pdf|doc|docx|xls|xlsx|zip|txt
-            extensions_no_dot = [ext.lstrip('.') for ext in self.SUPPORTED_EXTENSIONS.keys()]
-            ext_pattern = '|'.join(extensions_no_dot)
-            # Pattern: href=["']([^"']+\.(?:pdf|doc|docx|xls|xlsx|zip|txt))["']
-            link_pattern = r'href=["\']([^"\']+\.(?:' + ext_pattern + r'))["\']'
-            
-            matches = re.findall(link_pattern, content, re.IGNORECASE)
+            matches = self._LINK_RE.findall(content)
             
             for match in matches:
                 # Convert to absolute URL
@@ -1,3 +1,4 @@
+import asyncio
 import os
 import re
 import tempfile
@@ -9,6 +10,55 @@ class FileProcessor:
     """
     Handles file uploads to Gemini API and processing of attachments and URLs.
     """
+    MAX_ATTACHMENT_SIZE = 25 * 1024 * 1024  # 25MB in bytes
+    
+    # Vertex AI supported MIME types
+    # Reference: https://cloud.google.com/vertex-ai/generative-ai/docs/model-reference/gemini
+    _MIME_TYPES = {
+        # Documents
+        'pdf': 'application/pdf',
+        'txt': 'text/plain',
+        'md': 'text/markdown',
+        'html': 'text/html',
+        'htm': 'text/html',
+        'css': 'text/css',
+        'js': 'application/javascript',
+        'py': 'text/x-python',
+        'json': 'application/json',
+        'xml': 'application/xml',
+        'csv': 'text/csv',
+        
+        # Images
+        'jpg': 'image/jpeg',
+        'jpeg': 'image/jpeg',
+        'png': 'image/png',
+        'webp': 'image/webp',
+        'gif': 'image/gif',
+        'heic': 'image/heic',
+        'heif': 'image/heif',
+        
+        # Audio
+        'wav': 'audio/wav',
+        'mp3': 'audio/mp3',
+        'aiff': 'audio/aiff',
+        'aac': 'audio/aac',
+        'ogg': 'audio/ogg',
+        'flac': 'audio/flac',
+        
+        # Video
+        'mp4': 'video/mp4',
+        'mpeg': 'video/mpeg',
+        'mpg': 'video/mpeg',
+        'mov': 'video/mov',
+        'avi': 'video/avi',
+        'flv': 'video/x-flv',
+        'webm': 'video/webm',
+        'wmv': 'video/x-ms-wmv',
+        '3gp': 'video/3gpp',
+        '3gpp': 'video/3gpp',
+    }
+    _SUPPORTED_FORMATS_STR = ', '.join(sorted(_MIME_TYPES))
+    
     def __init__(self, client: genai.Client):
         self.client = client
     
@@ -29,13 +79,30 @@ class FileProcessor:
         Returns:
             (file_content, filename)
         """
-        response = requests.get(attachment_url)
-        response.raise_for_status()
+        # requests blocks, so run it in a worker thread to keep the event loop
+        # (and the other attachments being downloaded) moving
+        return await asyncio.to_thread(self._download_attachment, attachment_url)
+    
+    def _download_attachment(self, attachment_url: str) -> tuple[bytes, str]:
+        """Blocking part of download_discord_attachment."""
+        # Stream into one buffer so the body is held once and oversized files are cut off early
+        with requests.get(attachment_url, stream=True, timeout=30) as response:
+            response.raise_for_status()
+            
+            content_length = response.headers.get('content-length')
+            if content_length and int(content_length) > self.MAX_ATTACHMENT_SIZE:
+                raise ValueError(f"Attachment too large: {content_length} bytes > {self.MAX_ATTACHMENT_SIZE} bytes")
+            
+            buf = bytearray()
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                buf += chunk
+                if len(buf) > self.MAX_ATTACHMENT_SIZE:
+                    raise ValueError(f"Attachment exceeded {self.MAX_ATTACHMENT_SIZE} bytes during download")
         
         # Extract filename from URL or Content-Disposition header
         filename = attachment_url.split('/')[-1].split('?')[0]
         
-        return response.content, filename
+        return bytes(buf), filename
     
     def create_part_from_bytes(self, file_content: bytes, filename: str, mime_type: str):
         """
@@ -73,61 +140,16 @@ class FileProcessor:
         """
         Determine MIME type from filename extension.
         """
-        ext = filename.lower().split('.')[-1]
-        # Vertex AI supported MIME types
-        # Reference: https://cloud.google.com/vertex-ai/generative-ai/docs/model-reference/gemini
-        mime_types = {
-            # Documents
-            'pdf': 'application/pdf',
-            'txt': 'text/plain',
-            'md': 'text/markdown',
-            'html': 'text/html',
-            'htm': 'text/html',
-            'css': 'text/css',
-            'js': 'application/javascript',
-            'py': 'text/x-python',
-            'json': 'application/json',
-            'xml': 'application/xml',
-            'csv': 'text/csv',
-            
-            # Images
-            'jpg': 'image/jpeg',
-            'jpeg': 'image/jpeg',
-            'png': 'image/png',
-            'webp': 'image/webp',
-            'gif': 'image/gif',
-            'heic': 'image/heic',
-            'heif': 'image/heif',
-            
-            # Audio
-            'wav': 'audio/wav',
-            'mp3': 'audio/mp3',
-            'aiff': 'audio/aiff',
-            'aac': 'audio/aac',
-            'ogg': 'audio/ogg',
-            'flac': 'audio/flac',
-            
-            # Video
-            'mp4': 'video/mp4',
-            'mpeg': 'video/mpeg',
-            'mpg': 'video/mpeg',
-            'mov': 'video/mov',
-            'avi': 'video/avi',
-            'flv': 'video/x-flv',
-            'webm': 'video/webm',
-            'wmv': 'video/x-ms-wmv',
-            '3gp': 'video/3gpp',
-            '3gpp': 'video/3gpp',
-        }
-        if ext not in mime_types:
-            supported_formats = ', '.join(sorted(set(mime_types.keys())))
+        ext = filename.rpartition('.')[2].lower()
+        mime_type = self._MIME_TYPES.get(ext)
+        if mime_type is None:
             raise ValueError(
                 f"ファイル形式 '.{ext}' はサポートされていません。\n"
-                f"サポートされている形式: {supported_formats}\n"
+                f"サポートされている形式: {self._SUPPORTED_FORMATS_STR}\n"
                 f"ファイル名: {filename}"
             )
         
-        return mime_types[ext]
+        return mime_type
     
     async def process_discord_attachments(self, attachments: List[Any]) -> List[Any]:
         """
@@ -143,13 +165,22 @@ class FileProcessor:
         
         print(f"[DEBUG] Processing {len(attachments)} Discord attachments")
         
-        for i, attachment in enumerate(attachments, 1):
+        # Download from Discord CDN concurrently; a failed download does not cancel the others
+        for attachment in attachments:
+            print(f"[DEBUG]   Downloading from: {attachment.url}")
+        downloads = await asyncio.gather(
+            *(self.download_discord_attachment(attachment.url) for attachment in attachments),
+            return_exceptions=True,
+        )
+        
+        # Build the Parts in attachment order
+        for i, (attachment, download) in enumerate(zip(attachments, downloads), 1):
             try:
                 print(f"[DEBUG] Processing attachment {i}/{len(attachments)}: {attachment.filename}")
                 
-                # Download from Discord CDN
-                print(f"[DEBUG]   Downloading from: {attachment.url}")
-                content, filename = await self.download_discord_attachment(attachment.url)
+                if isinstance(download, BaseException):
+                    raise download
+                content, filename = download
                 print(f"[DEBUG]   Downloaded {len(content)} bytes")
                 
                 # Determine MIME type
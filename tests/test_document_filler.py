@@ -0,0 +1,304 @@
+"""
+Test suite for DocumentFiller output handling.
+
+Fills small generated templates and checks the files left in the output directory.
+"""
+
+import unittest
+import tempfile
+import shutil
+import sys
+import os
+import re
+import zipfile
+
+import openpyxl
+from docx import Document
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.tools.document_filler import DocumentFiller
+
+
+def _list_outputs(output_dir: str):
+    """Returns every file written under output_dir (relative paths)."""
+    found = []
+    for root, _dirs, files in os.walk(output_dir):
+        for name in files:
+            found.append(os.path.relpath(os.path.join(root, name), output_dir))
+    return sorted(found)
+
+
+class TestOutputReservation(unittest.TestCase):
+    """A fill that does not complete must not leave its reserved output file behind."""
+
+    def setUp(self):
+        """Set up a scratch directory for templates and outputs."""
+        self.work_dir = tempfile.mkdtemp()
+        self.output_dir = os.path.join(self.work_dir, "output")
+        self.filler = DocumentFiller(output_dir=self.output_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def _write_broken_template(self, name: str) -> str:
+        path = os.path.join(self.work_dir, name)
+        with open(path, "wb") as f:
+            f.write(b"not a zip package")
+        return path
+
+    def test_broken_excel_template_leaves_no_output(self):
+        """An unreadable .xlsx fails without leaving an empty .xlsx in the output directory."""
+        template = self._write_broken_template("broken.xlsx")
+
+        output_path, message = self.filler.fill_document(template, {"Sheet1_1_1": "値"}, user_id="u1")
+
+        self.assertIsNone(output_path)
+        self.assertEqual(_list_outputs(self.output_dir), [], message)
+
+    def test_broken_word_template_leaves_no_output(self):
+        """An unreadable .docx fails without leaving an empty .docx in the output directory."""
+        template = self._write_broken_template("broken.docx")
+
+        output_path, message = self.filler.fill_document(template, {"para_0": "値"}, user_id="u1")
+
+        self.assertIsNone(output_path)
+        self.assertEqual(_list_outputs(self.output_dir), [], message)
+
+
+class TestFillBatch(unittest.TestCase):
+    """fill_batch fills several templates and returns results in job order."""
+
+    def setUp(self):
+        """Set up a scratch directory and a one-sheet Excel template."""
+        self.work_dir = tempfile.mkdtemp()
+        self.output_dir = os.path.join(self.work_dir, "output")
+        self.filler = DocumentFiller(output_dir=self.output_dir)
+
+        self.template = os.path.join(self.work_dir, "form.xlsx")
+        wb = openpyxl.Workbook()
+        wb.active.title = "Sheet1"
+        wb.active["A1"] = "団体名"
+        wb.save(self.template)
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def test_results_follow_job_order(self):
+        """Jobs on the same template and second get distinct outputs, returned in job order."""
+        jobs = [
+            (self.template, {"Sheet1_1_2": "一つ目"}, "u1"),
+            (self.template, {"Sheet1_1_2": "二つ目"}, "u1"),
+            (os.path.join(self.work_dir, "missing.xlsx"), {"Sheet1_1_2": "三つ目"}, "u1"),
+        ]
+
+        results = self.filler.fill_batch(jobs)
+
+        self.assertEqual(len(results), 3)
+        (first, _), (second, _), (missing, _) = results
+        self.assertIsNone(missing)
+        self.assertNotEqual(first, second)
+        for path, expected in ((first, "一つ目"), (second, "二つ目")):
+            wb = openpyxl.load_workbook(path)
+            self.assertEqual(wb["Sheet1"]["B1"].value, expected)
+            wb.close()
+
+
+
+class TestExcelWritePaths(unittest.TestCase):
+    """
+    Without concern comments fill_excel patches the sheet XML directly; with them it
+    goes through openpyxl. Both paths must write the same cell values and types.
+    """
+
+    VALUES = {
+        "Sheet1_1_2": "テスト団体",
+        "Sheet1_2_2": 42,
+        "Sheet1_3_1": 3.5,
+        "Sheet1_4_1": True,
+        "Sheet1_5_1": "=SUM(1,2)",
+        "Sheet1_6_1": "#N/A",
+        "Sheet1_7_1": "  前後に空白  ",
+        "Sheet1_8_1": "=",
+        "Sheet1_9_1": "長" * 40000,
+        # Outside the worksheet (row 1048577 / column XFE): skipped on both paths
+        "Sheet1_1048577_1": "範囲外",
+        "Sheet1_1_16385": "範囲外",
+    }
+
+    def setUp(self):
+        """Set up a scratch directory and a template with existing values."""
+        self.work_dir = tempfile.mkdtemp()
+        self.filler = DocumentFiller(output_dir=os.path.join(self.work_dir, "output"))
+
+        self.template = os.path.join(self.work_dir, "form.xlsx")
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.title = "Sheet1"
+        ws["A1"] = "団体名"
+        ws["B2"] = "置き換える値"
+        ws["C3"] = 10
+        wb.save(self.template)
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def _fill(self, field_values):
+        output_path, message = self.filler.fill_document(self.template, field_values, user_id="u1")
+        self.assertIsNotNone(output_path, message)
+        return output_path
+
+    def _read_cells(self, path):
+        wb = openpyxl.load_workbook(path)
+        try:
+            return {
+                cell.coordinate: (cell.value, cell.data_type)
+                for row in wb["Sheet1"].iter_rows()
+                for cell in row
+                if cell.value is not None
+            }
+        finally:
+            wb.close()
+
+    def test_patch_and_openpyxl_paths_write_the_same_cells(self):
+        """The same values give the same cells whether or not a concern comment is attached."""
+        patched = self._fill(dict(self.VALUES))
+        with zipfile.ZipFile(patched) as z:
+            self.assertIn(b"inlineStr", z.read("xl/worksheets/sheet1.xml"), "expected the sheet XML patch path")
+
+        with_concern = dict(self.VALUES)
+        with_concern["Sheet1_1_2"] = {
+            "value": self.VALUES["Sheet1_1_2"],
+            "concern_type": "needs_confirmation",
+            "concern_reason": "団体名の表記を確認してください",
+        }
+        via_openpyxl = self._fill(with_concern)
+
+        patched_cells = self._read_cells(patched)
+        self.assertEqual(patched_cells, self._read_cells(via_openpyxl))
+
+        self.assertEqual(patched_cells["B1"], ("テスト団体", "s"))
+        self.assertEqual(patched_cells["B2"], (42, "n"))
+        self.assertEqual(patched_cells["A4"], (True, "b"))
+        self.assertEqual(patched_cells["A5"], ("=SUM(1,2)", "f"))
+        self.assertEqual(patched_cells["A6"], ("#N/A", "e"))
+        self.assertEqual(patched_cells["A8"], ("=", "s"))
+        self.assertEqual(len(patched_cells["A9"][0]), 32767)
+        self.assertEqual(patched_cells["C3"], (10, "n"))
+
+
+
+class TestWordFastPath(unittest.TestCase):
+    """
+    fill_word reads and writes only word/document.xml when it can. The result must match
+    the python-docx path, and the rest of the package must be copied unchanged.
+    """
+
+    FIELDS = {
+        "para_1": {
+            "value": "NPO法人テスト & <co>",
+            "input_pattern": "inline",
+            "concern_type": "uncertain",
+            "concern_reason": "正式名称を確認 & <check>",
+            "field_name": "団体名",
+        },
+        "para_2": {"value": "山田太郎", "input_pattern": "bracket"},
+        "table0_1_1": {"value": "100万円", "input_length_type": "short"},
+        "table0_0_1": "旧形式の値",
+    }
+
+    def setUp(self):
+        """Set up a scratch directory and a template with paragraphs and a table."""
+        self.work_dir = tempfile.mkdtemp()
+        self.output_dir = os.path.join(self.work_dir, "output")
+
+        self.template = os.path.join(self.work_dir, "form.docx")
+        doc = Document()
+        doc.add_paragraph("申請書")
+        doc.add_paragraph("団体名：")
+        doc.add_paragraph("代表者：（入力してください）")
+        table = doc.add_table(rows=2, cols=2)
+        table.cell(0, 0).text = "項目"
+        table.cell(1, 0).text = "予算"
+        doc.save(self.template)
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def _fill(self, template, fields, **kwargs):
+        filler = DocumentFiller(output_dir=self.output_dir, **kwargs)
+        output_path, message = filler.fill_document(template, fields, user_id="u1")
+        self.assertIsNotNone(output_path, message)
+        return output_path
+
+    def _read_parts(self, path):
+        with zipfile.ZipFile(path) as z:
+            parts = {name: z.read(name) for name in z.namelist()}
+        if "word/comments.xml" in parts:
+            # Comment dates are the fill time
+            parts["word/comments.xml"] = re.sub(rb'w:date="[^"]*"', b"", parts["word/comments.xml"])
+        return parts
+
+    def test_fast_path_matches_python_docx(self):
+        """document.xml and comments.xml are the same with and without the fast path."""
+        fast = self._read_parts(self._fill(self.template, self.FIELDS))
+        full = self._read_parts(self._fill(self.template, self.FIELDS, use_lxml_fast_path=False))
+
+        self.assertEqual(fast["word/document.xml"], full["word/document.xml"])
+        self.assertEqual(fast["word/comments.xml"], full["word/comments.xml"])
+
+    def test_fast_path_fills_and_comments(self):
+        """Values land in the paragraphs and cells, and the concern becomes a native comment."""
+        output_path = self._fill(self.template, self.FIELDS)
+
+        doc = Document(output_path)
+        self.assertEqual(doc.paragraphs[1].text, "団体名： NPO法人テスト & <co>")
+        self.assertIn("山田太郎", doc.paragraphs[2].text)
+        self.assertEqual(doc.tables[0].cell(0, 1).text, "旧形式の値")
+        self.assertEqual(doc.tables[0].cell(1, 1).text, "100万円")
+
+        parts = self._read_parts(output_path)
+        self.assertIn("正式名称を確認 &amp; &lt;check&gt;", parts["word/comments.xml"].decode("utf-8"))
+        self.assertIn(b"comments.xml", parts["word/_rels/document.xml.rels"])
+        self.assertIn(b"comments.xml", parts["[Content_Types].xml"])
+        self.assertEqual(parts["word/document.xml"].count(b"commentReference"), 1)
+
+    def test_fast_path_copies_untouched_parts(self):
+        """Every part other than the document, comments and their references is copied as is."""
+        template_parts = self._read_parts(self.template)
+        output_parts = self._read_parts(self._fill(self.template, self.FIELDS))
+
+        changed = {
+            "word/document.xml", "word/comments.xml",
+            "word/_rels/document.xml.rels", "[Content_Types].xml",
+        }
+        for name, data in template_parts.items():
+            if name not in changed:
+                self.assertEqual(output_parts.get(name), data, name)
+
+    def test_template_with_comments_keeps_them(self):
+        """A template that already has comments.xml (python-docx path) keeps its comments."""
+        template = os.path.join(self.work_dir, "commented.docx")
+        doc = Document()
+        para = doc.add_paragraph("既存コメント付きの段落")
+        doc.add_comment(para.runs, text="元のコメント", author="reviewer")
+        doc.add_paragraph("団体名：")
+        doc.save(template)
+
+        fields = {"para_1": dict(self.FIELDS["para_1"])}
+        comments = self._read_parts(self._fill(template, fields))["word/comments.xml"].decode("utf-8")
+
+        self.assertIn("元のコメント", comments)
+        self.assertIn("正式名称を確認", comments)
+
+    def test_output_is_the_only_file_written(self):
+        """The write goes through a temp file that is renamed onto the reserved output name."""
+        output_path = self._fill(self.template, self.FIELDS)
+
+        self.assertEqual(_list_outputs(self.output_dir), [os.path.relpath(output_path, self.output_dir)])
+        self.assertGreater(os.path.getsize(output_path), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
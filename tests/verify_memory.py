@@ -1,8 +1,11 @@
+import gzip
+import json
 import os
 import shutil
 import unittest
 from unittest.mock import MagicMock, patch
-from src.memory.profile_manager import ProfileManager, LocalProfileStorage, GCSProfileStorage
+from src.memory import profile_manager
+from src.memory.profile_manager import ProfileManager, LocalProfileStorage, GCSProfileStorage, NotFound
 
 class TestProfileManager(unittest.TestCase):
     
@@ -53,6 +56,43 @@ class TestProfileManager(unittest.TestCase):
             
         print("Local Storage Test Passed!")
 
+    def test_local_storage_two_managers(self):
+        """Two ProfileManagers for the same user see each other's saved changes."""
+        print("\nTesting Local Storage with two managers...")
+        os.environ["APP_ENV"] = "local"
+        
+        user_id = "test_user_local_shared"
+        expected_path = os.path.join("profiles", f"{user_id}_profile.json")
+        try:
+            pm_a = ProfileManager(user_id)
+            pm_b = ProfileManager(user_id)
+            
+            # Each manager owns its profile; A's write must not change B behind its caches
+            pm_a.update_key_insight("mission", "Mission from A")
+            self.assertNotIn("Mission from A", pm_b.get_profile_context())
+            
+            # B picks up A's change when it loads again, and adds its own on top
+            pm_b = ProfileManager(user_id)
+            self.assertIn("Mission from A", pm_b.get_profile_context())
+            pm_b.update_key_insight("vision", "Vision from B")
+            
+            pm_a = ProfileManager(user_id)
+            context = pm_a.get_profile_context()
+            self.assertIn("Mission from A", context)
+            self.assertIn("Vision from B", context)
+            
+            # A profile edited on disk is read again instead of served from the cache
+            with open(expected_path, "w", encoding="utf-8") as f:
+                f.write('{"insights": {"mission": "Edited on disk"}}')
+            st = os.stat(expected_path)
+            os.utime(expected_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+            self.assertIn("Edited on disk", ProfileManager(user_id).get_profile_context())
+        finally:
+            if os.path.exists(expected_path):
+                os.remove(expected_path)
+        
+        print("Local Storage Two Managers Test Passed!")
+
     @patch("src.memory.profile_manager.storage")
     def test_gcs_storage(self, mock_storage):
         """Test GCSProfileStorage and ProfileManager in production mode."""
@@ -69,13 +109,20 @@ class TestProfileManager(unittest.TestCase):
         mock_client.bucket.return_value = mock_bucket
         mock_bucket.blob.return_value = mock_blob
         
-        # Setup mock blob behavior
-        mock_blob.exists.return_value = False # First load returns empty
+        # Setup mock blob behavior: the profile does not exist yet
+        mock_blob.download_as_bytes.side_effect = NotFound("missing")
         
         user_id = "test_user_gcs"
-        pm = ProfileManager(user_id)
+        with patch("builtins.print") as mock_print:
+            pm = ProfileManager(user_id)
+            self.assertEqual(pm.storage.load(user_id), {})
         
         self.assertIsInstance(pm.storage, GCSProfileStorage)
+        # A missing blob is handled by NotFound alone, without an exists() round trip or an error log
+        mock_blob.download_as_bytes.assert_called()
+        mock_blob.exists.assert_not_called()
+        for call in mock_print.call_args_list:
+            self.assertNotIn("Error loading from GCS", " ".join(map(str, call.args)))
         
         # Update profile
         pm.update_key_insight("mission", "To fly to the cloud")
@@ -86,9 +133,141 @@ class TestProfileManager(unittest.TestCase):
         
         # Check args
         args, kwargs = mock_blob.upload_from_string.call_args
-        self.assertIn("To fly to the cloud", args[0])
+        # The profile document is uploaded gzip-compressed (Content-Encoding: gzip)
+        self.assertIn("To fly to the cloud", gzip.decompress(args[0]).decode("utf-8"))
         
         print("GCS Storage Test Passed!")
 
+class FakeBlob:
+    """In-memory stand-in for a GCS blob (upload, download, compose, delete)."""
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = name
+        self.content_encoding = None
+
+    def download_as_bytes(self):
+        if self.name not in self.bucket.objects:
+            raise NotFound(self.name)
+        return self.bucket.objects[self.name]
+
+    def upload_from_string(self, data, content_type=None):
+        self.bucket.objects[self.name] = data.encode("utf-8") if isinstance(data, str) else data
+        self.bucket.uploads.append(self.name)
+
+    def compose(self, sources):
+        for source in sources:
+            if source.name not in self.bucket.objects:
+                raise NotFound(source.name)
+        self.bucket.objects[self.name] = b"".join(self.bucket.objects[source.name] for source in sources)
+        self.bucket.composes.append(self.name)
+
+    def delete(self):
+        self.bucket.objects.pop(self.name, None)
+
+
+class FakeBucket:
+    """In-memory stand-in for a GCS bucket that records uploads and composes."""
+    def __init__(self):
+        self.objects = {}
+        self.uploads = []
+        self.composes = []
+
+    def blob(self, name):
+        return FakeBlob(self, name)
+
+
+class TestAppendOnlyLists(unittest.TestCase):
+    """APPEND_ONLY_KEYS lists are stored as NDJSON blobs and appended via compose."""
+
+    def setUp(self):
+        self.bucket = FakeBucket()
+        self.patches = [
+            patch.dict(os.environ, {"APP_ENV": "production", "GCS_BUCKET_NAME": "fake-bucket", "USE_MEMORY_BANK": "false"}),
+            patch("src.memory.profile_manager.storage", MagicMock()),
+            patch("src.memory.profile_manager._get_gcs_client", return_value=MagicMock()),
+            patch("src.memory.profile_manager._get_gcs_bucket", return_value=self.bucket),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in reversed(self.patches):
+            p.stop()
+
+    def _records(self, name):
+        content = self.bucket.objects.get(name, b"")
+        return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+    def test_history_is_appended_to_its_own_blob(self):
+        """Turns go to conversation_history.jsonl: uploaded first, then composed onto."""
+        pm = ProfileManager("npo1")
+        pm.add_to_history("user", "こんにちは")
+        with pm.transaction():
+            pm.add_to_history("agent", "ようこそ")
+            pm.add_to_history("user", "よろしく")
+
+        list_blob = "profiles/npo1/conversation_history.jsonl"
+        self.assertEqual(
+            [turn["content"] for turn in self._records(list_blob)],
+            ["こんにちは", "ようこそ", "よろしく"],
+        )
+        # The transaction appended both turns with a single compose
+        self.assertEqual(self.bucket.composes, [list_blob])
+        # Temp blobs used for composing are removed, and the list is not in the profile document
+        self.assertFalse([name for name in self.bucket.objects if name.endswith(".tmp")])
+        self.assertNotIn(b"conversation_history", self.bucket.objects.get("profiles/npo1/soul_profile.json", b""))
+
+    def test_lists_are_loaded_lazily_and_appends_before_load_are_kept(self):
+        """A manager that appends without reading the list first does not lose earlier records."""
+        ProfileManager("npo1").add_to_history("user", "一回目")
+
+        pm = ProfileManager("npo1")
+        pm.add_to_history("user", "二回目")
+        self.assertEqual([turn["content"] for turn in pm.get_conversation_history()], ["一回目", "二回目"])
+
+        pm.add_shown_grant({"title": "助成金A", "url": "https://example.com/a"})
+        self.assertTrue(ProfileManager("npo1").is_grant_shown({"title": "助成金A", "url": "https://example.com/a"}))
+
+    def test_legacy_embedded_lists_are_moved_out(self):
+        """A profile that still embeds a list has it moved to its own blob on the next commit."""
+        self.bucket.objects["profiles/npo1/soul_profile.json"] = json.dumps({
+            "insights": {"mission": "子ども支援"},
+            "conversation_history": [{"role": "user", "content": "古い発言"}],
+        }).encode("utf-8")
+
+        pm = ProfileManager("npo1")
+        pm.add_to_history("user", "新しい発言")
+
+        self.assertEqual(
+            [turn["content"] for turn in self._records("profiles/npo1/conversation_history.jsonl")],
+            ["古い発言", "新しい発言"],
+        )
+        document = json.loads(gzip.decompress(self.bucket.objects["profiles/npo1/soul_profile.json"]))
+        self.assertNotIn("conversation_history", document)
+        self.assertEqual(document["insights"]["mission"], "子ども支援")
+
+    def test_history_rolls_up_into_a_digest(self):
+        """Past MAX_LIVE_HISTORY turns, the oldest move to history_archive behind a digest entry."""
+        pm = ProfileManager("npo1")
+        turns = profile_manager.MAX_LIVE_HISTORY + 1
+        for i in range(turns):
+            pm.add_to_history("user" if i % 2 == 0 else "agent", f"発言{i}")
+
+        history = pm.get_conversation_history()
+        self.assertEqual(history[0]["role"], "system")
+        self.assertIn("発言0", history[0]["content"])
+        self.assertEqual(len(history), 1 + turns - profile_manager.HISTORY_ROLLUP_SIZE)
+        self.assertEqual(history[1]["content"], f"発言{profile_manager.HISTORY_ROLLUP_SIZE}")
+        self.assertEqual(pm.get_turn_count(), (turns + 1) // 2)
+
+        # A fresh manager reads the same state back from the stored lists
+        reloaded = ProfileManager("npo1")
+        self.assertEqual(reloaded.get_conversation_history(), history)
+        self.assertEqual(reloaded.get_turn_count(), (turns + 1) // 2)
+        self.assertEqual(
+            [turn["content"] for turn in self._records("profiles/npo1/history_archive.jsonl")],
+            [f"発言{i}" for i in range(profile_manager.HISTORY_ROLLUP_SIZE)],
+        )
+
 if __name__ == "__main__":
     unittest.main()